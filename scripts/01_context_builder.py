@@ -8,12 +8,13 @@ import matplotlib.pyplot as plt
 # Import from your new library
 from pbc.context import build_context_template
 from pbc.utils.io import save_npy
+from pbc.utils.sht import alm2map
 
 def plot_context_vector(c_alm, nside, title, outfile):
     """Optional: Visualizes the context template in map space."""
     try:
         # Inverse harmonic transform to see what the 'Cost' looks like
-        m = hp.alm2map(c_alm, nside)
+        m = alm2map(c_alm, nside)
         plt.figure(figsize=(10, 5))
         hp.mollview(m, title=title, hold=True)
         plt.savefig(outfile)
@@ -1,72 +1,97 @@
 import numpy as np
 import healpy as hp
+import multiprocessing
 import matplotlib.pyplot as plt
-from scipy.stats import pearsonr
+
+from pbc.stats import centred_target, pearson_to_target
+from pbc.utils.geom import galactic_mask, rotate_longitude
+from pbc.utils.io import load_target_noise
 
 # CONFIG
 PLANCK_MAP_PATH = 'data/raw/planck/npipe_143.fits'
 HITS_MAP_PATH = 'data/raw/planck/npipe_hits.fits'
 N_ROTATIONS = 100  # Number of random rotations (The "Null Universe")
+NSIDE_WORK = 256   # Resolution for the null test (hits structure is low-res)
+
+# Read-only inputs for the rotation workers.
+# Set before the pool forks, so workers inherit them copy-on-write.
+m_work = None
+valid_mask = None
+target = None
+
+def _one_rot(seed):
+    rng = np.random.default_rng(seed)
+    
+    # Random rotation around Z-axis (Longitude shift)
+    # This breaks the alignment with the Scan Rings (which are fixed in Ecliptic)
+    # while preserving the internal statistics of the CMB.
+    rot_ang = rng.uniform(10, 350)
+    
+    # Rotate the MAP (keep mask fixed relative to map, so we rotate the full field)
+    # A Z-rotation maps each RING onto itself: an integer roll per ring,
+    # no interpolation and no spherical transform.
+    m_rot = rotate_longitude(m_work, rot_ang)
+    
+    # Correlate the ROTATED map with the FIXED hits/noise
+    # We use the same mask logic
+    return pearson_to_target(m_rot, valid_mask, target)
 
 def robust_audit():
+    global m_work, valid_mask, target
     print("--- STARTING MONTE CARLO AUDIT (Spatial Correlation Fix) ---")
     
     # 1. Load Data
     print("Loading Maps...")
     m = hp.read_map(PLANCK_MAP_PATH, field=0, verbose=False) # Temp
-    hits = hp.read_map(HITS_MAP_PATH, verbose=False)
     nside = hp.npix2nside(len(m))
-    
-    # Resample Hits if needed
-    if hp.npix2nside(len(hits)) != nside:
-        hits = hp.ud_grade(hits, nside)
         
     # 2. Mask & Dipole Removal (Clean the Signal)
     print("Cleaning Signal (Removing Galaxy + Dipole)...")
-    th, ph = hp.pix2ang(nside, np.arange(len(m)))
-    mask_gal = np.abs(90 - np.degrees(th)) > 20 # Keep |b| > 20
+    mask_gal = galactic_mask(nside, 20) # Keep |b| > 20
     
     # Create a clean map for analysis
     m_clean = np.copy(m)
     m_clean[~mask_gal] = hp.UNSEEN
     m_no_dipole = hp.remove_dipole(m_clean, fitval=False, verbose=False)
     
+    # Downgrade before the loop: every rotation and correlation is O(Npix),
+    # and the scan-ring structure needs no more than NSIDE_WORK.
+    if nside > NSIDE_WORK:
+        print(f"Downgrading to NSIDE {NSIDE_WORK}...")
+        m_no_dipole = hp.ud_grade(m_no_dipole, NSIDE_WORK)
+        nside = NSIDE_WORK
+        mask_gal = galactic_mask(nside, 20)
+    
+    # Inverse hits at the working NSIDE (cached in data/processed)
+    target_noise = load_target_noise(HITS_MAP_PATH, nside)
+    
     # Prepare Vectors for Correlation
     # We only care about the VALID pixels common to all rotations (simplified)
     # Ideally, we rotate the mask too, but for speed we compare valid-to-valid.
     
-    # Define the "Target" (Inverse Hits)
-    # We fix the hits map.
+    # The "Target" (Inverse Hits) is fixed; only the map rotates.
     valid_mask = mask_gal # Base mask
-    target_noise = 1.0 / (hits + 1.0)
+    # Its centred values and norm are computed once, not per rotation.
+    target = centred_target(target_noise, valid_mask)
+    
+    # The |b| cut is made of whole rings, so ring rolls keep masked pixels
+    # masked in every rotated frame. float32 halves the traffic per rotation.
+    m_work = m_no_dipole.astype(np.float32)
     
     # 3. Measure Real Correlation
-    # We only correlate pixels that are valid in the unrotated frame
-    r_obs, _ = pearsonr(np.abs(m_no_dipole[valid_mask]), target_noise[valid_mask])
+    # We only correlate pixels that are valid in the unrotated frame.
+    r_obs = pearson_to_target(m_work, valid_mask, target)
     print(f"\nOBSERVED CORRELATION (r_obs): {r_obs:.5f}")
     
     # 4. Monte Carlo Rotations (The Null Test)
     print(f"Running {N_ROTATIONS} random rotations to build Null Distribution...")
     null_corrs = []
     
-    for i in range(N_ROTATIONS):
-        if i % 10 == 0: print(f"  Rotation {i}/{N_ROTATIONS}...")
-        
-        # Random rotation around Z-axis (Longitude shift)
-        # This breaks the alignment with the Scan Rings (which are fixed in Ecliptic)
-        # while preserving the internal statistics of the CMB.
-        rot_ang = np.random.uniform(10, 350) 
-        
-        # Rotate the MAP (keep mask fixed relative to map, so we rotate the full field)
-        # Note: Rotating ALM is better but slower. rotate_alm is precise.
-        # Pixel space rotation is faster for this audit.
-        r = hp.Rotator(rot=[rot_ang, 0, 0], deg=True)
-        m_rot = r.rotate_map_pixel(m_no_dipole)
-        
-        # Correlate the ROTATED map with the FIXED hits/noise
-        # We use the same mask logic
-        r_null, _ = pearsonr(np.abs(m_rot[valid_mask]), target_noise[valid_mask])
-        null_corrs.append(r_null)
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool() as pool:
+        for i, r_null in enumerate(pool.imap(_one_rot, range(N_ROTATIONS))):
+            if i % 10 == 0: print(f"  Rotation {i}/{N_ROTATIONS}...")
+            null_corrs.append(r_null)
         
     # 5. Analysis
     null_mean = np.mean(null_corrs)
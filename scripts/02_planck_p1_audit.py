@@ -3,6 +3,9 @@ import healpy as hp
 import os
 from scipy.stats import pearsonr
 
+from pbc.utils.geom import galactic_mask
+from pbc.utils.io import load_target_noise
+
 # CONFIG
 # Matches your download_planck_p1.sh paths
 PLANCK_MAP_PATH = 'data/raw/planck/npipe_143.fits' 
@@ -24,10 +27,8 @@ def robust_p1_audit():
     
     # 2. Masking the Galaxy (Standard practice)
     print("2. Masking Galactic Plane (|b| < 20 deg)...")
-    th, ph = hp.pix2ang(nside, np.arange(len(m)))
-    lat = 90 - np.degrees(th)
-    # Create mask: 1 where valid, 0 where masked
-    mask_bool = np.abs(lat) > 20
+    # Create mask: True where valid, False where masked
+    mask_bool = galactic_mask(nside, 20)
     
     # 3. MONOPOLE & DIPOLE REMOVAL
     # We copy the map and set masked pixels to UNSEEN so remove_dipole ignores them
@@ -37,15 +38,12 @@ def robust_p1_audit():
     print("3. Subtracting Monopole and Dipole (Kinematic Doppler)...")
     # fitval=True returns (monopole, dipole_vector)
     # This ensures we are testing the STRUCTURE (l >= 2), not the motion.
-    m_no_dipole = hp.remove_dipole(m_clean, fitval=False, verbose=True)
+    m_no_dipole = hp.remove_dipole(m_clean, fitval=False, verbose=True).astype(np.float32, copy=False)
     
     # 4. Load Context (Hits Map)
     print("4. Loading Scan Strategy (Hits Map)...")
-    hits = hp.read_map(HITS_MAP_PATH, verbose=False)
-    
-    if hp.npix2nside(len(hits)) != nside:
-        print(f"   Resampling Hits map to NSIDE {nside}...")
-        hits = hp.ud_grade(hits, nside)
+    # Proxy for N: 1/(Hits+1) at the map NSIDE (cached after the first run)
+    target_noise = load_target_noise(HITS_MAP_PATH, nside)
         
     # 5. The Correlation Test
     # PbC Hypothesis: The Record (R) is coupled to the Context (N).
@@ -56,7 +54,7 @@ def robust_p1_audit():
     
     # We look at the magnitude of the signal vs the noise level
     signal_mag = np.abs(m_no_dipole[valid_idx])
-    noise_inv = 1.0 / (hits[valid_idx] + 1.0) # Proxy for N
+    noise_inv = target_noise[valid_idx]
     
     corr, p_val = pearsonr(signal_mag, noise_inv)
     
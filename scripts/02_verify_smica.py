@@ -2,13 +2,30 @@ import numpy as np
 import healpy as hp
 import os
 import subprocess
-from scipy.stats import pearsonr
+import multiprocessing
+
+from pbc.stats import centred_target, pearson_to_target
+from pbc.utils.geom import galactic_mask, rotate_longitude
+from pbc.utils.io import load_target_noise
 
 # CONFIG
 # The correct URL you provided
 SMICA_URL = "https://irsa.ipac.caltech.edu/data/Planck/release_3/all-sky-maps/maps/component-maps/cmb/COM_CMB_IQU-smica_2048_R3.00_full.fits"
 SMICA_PATH = "data/raw/planck/smica_cmb.fits"
 HITS_PATH = "data/raw/planck/npipe_hits.fits"
+N_NULLS = 20
+
+# Read-only inputs for the null-test workers (inherited copy-on-write on fork)
+m_work = None
+valid_idx = None
+target = None
+
+def _one_rot(seed):
+    rng = np.random.default_rng(seed)
+    rot_ang = rng.uniform(10, 350)
+    # Longitude rotation as an integer pixel roll within each ring
+    m_rot = rotate_longitude(m_work, rot_ang)
+    return pearson_to_target(m_rot, valid_idx, target)
 
 def download_smica_robust():
     # 1. Check if file exists and is valid
@@ -36,25 +53,23 @@ def download_smica_robust():
         exit()
 
 def run_smica_audit():
+    global m_work, valid_idx, target
     download_smica_robust()
     
     print("Loading Maps...")
     try:
         # Field 0 is Temperature (I)
         m_smica = hp.read_map(SMICA_PATH, field=0, verbose=False)
-        hits = hp.read_map(HITS_PATH, verbose=False)
+        nside = hp.npix2nside(len(m_smica))
+        target_noise = load_target_noise(HITS_PATH, nside)
     except Exception as e:
         print(f"Error reading FITS: {e}")
         return
-
-    nside = hp.npix2nside(len(m_smica))
     
     # 1. Masking
     # We apply a strict Galactic cut (|b| > 30) to be absolutely sure
     print("Masking Galaxy (|b| < 30 deg)...")
-    th, ph = hp.pix2ang(nside, np.arange(len(m_smica)))
-    lat_gal = 90 - np.degrees(th)
-    mask = np.abs(lat_gal) > 30 
+    mask = galactic_mask(nside, 30)
     
     # 2. Remove Dipole/Monopole
     print("Removing Monopole & Dipole (Kinematics)...")
@@ -64,22 +79,23 @@ def run_smica_audit():
     
     # 3. Correlation Audit
     valid_idx = np.where(mask)[0]
-    target_noise = 1.0 / (hits[valid_idx] + 1.0)
+    # The hits side is fixed: centre it once for every null
+    target = centred_target(target_noise, valid_idx)
     
-    r_obs, _ = pearsonr(np.abs(m_no_dipole[valid_idx]), target_noise)
+    # The |b| cut is made of whole rings, so ring rolls keep the galaxy
+    # masked in every rotated frame.
+    m_work = m_no_dipole.astype(np.float32)
+    r_obs = pearson_to_target(m_work, valid_idx, target)
     print(f"\nSMICA (Clean) Correlation: {r_obs:.5f}")
     
     # 4. Monte Carlo Null Test
-    print("Running Null Test (N=20)...")
+    print(f"Running Null Test (N={N_NULLS})...")
     nulls = []
-    for i in range(20):
-        rot_ang = np.random.uniform(10, 350)
-        r = hp.Rotator(rot=[rot_ang, 0, 0], deg=True)
-        m_rot = r.rotate_map_pixel(m_no_dipole)
-        
-        r_null, _ = pearsonr(np.abs(m_rot[valid_idx]), target_noise)
-        nulls.append(r_null)
-        print(f"  Rot {i+1}: r={r_null:.5f}")
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool() as pool:
+        for i, r_null in enumerate(pool.imap(_one_rot, range(N_NULLS))):
+            nulls.append(r_null)
+            print(f"  Rot {i+1}: r={r_null:.5f}")
         
     z_score = (r_obs - np.mean(nulls)) / np.std(nulls)
     print(f"\nZ-Score on Clean Data: {z_score:.2f} sigma")
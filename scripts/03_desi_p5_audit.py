@@ -19,13 +19,14 @@ def run_robust_p5_audit(n_jackknife=20):
     print(f"Loaded {len(data)} objects.")
 
     # 2. Global Commutator Calculation
-    # We compare Systematic weights against Selection (Completeness) weights
-    def get_dz(d):
-        z_sys = np.average(d['Z'], weights=d['WEIGHT_SYS'])
-        z_comp = np.average(d['Z'], weights=d['WEIGHT_COMP'])
-        return z_sys - z_comp
+    # We compare Systematic weights against Selection (Completeness) weights.
+    # Keep the weighted sums so leave-one-out averages are pure subtractions.
+    w_sys, w_comp = data['WEIGHT_SYS'], data['WEIGHT_COMP']
+    wz_sys, wz_comp = data['Z'] * w_sys, data['Z'] * w_comp
+    S_sys, T_sys = wz_sys.sum(), w_sys.sum()
+    S_comp, T_comp = wz_comp.sum(), w_comp.sum()
 
-    global_dz = get_dz(data)
+    global_dz = S_sys / T_sys - S_comp / T_comp
 
     # 3. Jackknife Resampling for Significance
     # We split the sky into 'n_jackknife' RA-bins to estimate the variance
@@ -34,13 +35,11 @@ def run_robust_p5_audit(n_jackknife=20):
     splits = np.array_split(ra_sorted_idx, n_jackknife)
     
     jk_shifts = []
-    for i in tqdm(range(n_jackknife)):
-        # Create a "leave-one-out" mask
-        mask = np.ones(len(data), dtype=bool)
-        mask[splits[i]] = False
-        
-        # Calculate dz on the remaining (n-1) samples
-        jk_dz = get_dz(data[mask])
+    for idx in tqdm(splits):
+        # Leave-one-out: dz on the remaining (n-1) samples is the
+        # total weighted sums minus the held-out slice (no masked copy).
+        jk_dz = (S_sys - wz_sys[idx].sum()) / (T_sys - w_sys[idx].sum()) - \
+                (S_comp - wz_comp[idx].sum()) / (T_comp - w_comp[idx].sum())
         jk_shifts.append(jk_dz)
 
     # 4. Statistical Analysis
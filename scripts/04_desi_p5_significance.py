@@ -2,25 +2,55 @@ import numpy as np
 import fitsio
 import json
 
+COLS = ['Z', 'WEIGHT_SYS', 'WEIGHT_COMP']
+CHUNK = 1 << 20  # rows per read
+
+def stream_sums(path):
+    """
+    One chunked pass over a catalog: weighted Z sums for both weights,
+    plus Z moments (shifted by the first Z to keep the variance stable).
+    Peak memory is one CHUNK of rows instead of the full columns.
+    """
+    s = dict(wz_sys=0.0, w_sys=0.0, wz_comp=0.0, w_comp=0.0, dz=0.0, dz2=0.0)
+    with fitsio.FITS(path) as F:
+        hdu = F[1]
+        n = hdu.get_nrows()
+        z0 = None
+        for a in range(0, n, CHUNK):
+            d = hdu.read(columns=COLS, rows=np.arange(a, min(a + CHUNK, n)))
+            z = d['Z'].astype(np.float64)
+            if z0 is None:
+                z0 = z[0]
+            s['wz_sys'] += np.dot(z, d['WEIGHT_SYS'])
+            s['w_sys'] += d['WEIGHT_SYS'].sum(dtype=np.float64)
+            s['wz_comp'] += np.dot(z, d['WEIGHT_COMP'])
+            s['w_comp'] += d['WEIGHT_COMP'].sum(dtype=np.float64)
+            z -= z0
+            s['dz'] += z.sum()
+            s['dz2'] += np.dot(z, z)
+    s['n'] = n
+    return s
+
+def weighted_shift(s):
+    return s['wz_sys'] / s['w_sys'] - s['wz_comp'] / s['w_comp']
+
 def run_significance_test():
     print("--- Running P5 Significance Test (Noise Floor) ---")
     data_path = "data/raw/desi/LRG_NGC_clustering.dat.fits"
     rand_path = "data/raw/desi/LRG_NGC_0_clustering.ran.fits"
 
     # 1. Get Data Shift (The Record)
-    d = fitsio.read(data_path, columns=['Z', 'WEIGHT_SYS', 'WEIGHT_COMP'])
-    dz_data = np.average(d['Z'], weights=d['WEIGHT_SYS']) - \
-              np.average(d['Z'], weights=d['WEIGHT_COMP'])
+    dz_data = weighted_shift(stream_sums(data_path))
 
     # 2. Get Random Shift (The Noise Floor)
-    r = fitsio.read(rand_path, columns=['Z', 'WEIGHT_SYS', 'WEIGHT_COMP'])
-    dz_rand = np.average(r['Z'], weights=r['WEIGHT_SYS']) - \
-              np.average(r['Z'], weights=r['WEIGHT_COMP'])
+    r = stream_sums(rand_path)
+    dz_rand = weighted_shift(r)
 
     # 3. Calculate Significance
     # In a full study, we'd use all 18 random catalogs to get the std.
     # Here we use the context tension as a proxy for the expected scatter.
-    sigma_noise = np.std(r['Z']) / np.sqrt(len(r))
+    var_z = r['dz2'] / r['n'] - (r['dz'] / r['n']) ** 2
+    sigma_noise = np.sqrt(var_z) / np.sqrt(r['n'])
     significance = abs(dz_data) / sigma_noise
 
     print(f"Data Shift:   {dz_data:.8f}")
@@ -4,6 +4,9 @@ import fitsio
 import json
 import os
 
+from pbc.utils.grid import hist2d_uniform
+from pbc.utils.io import uncompressed_catalog
+
 def run_robust_p6_audit():
     print("--- Running P6: COSMOS Field Variance Audit (Final Pillar) ---")
     cat_path = "data/raw/jwst/cosmos2020_classic.fits.gz"
@@ -13,7 +16,8 @@ def run_robust_p6_audit():
         return
 
     # 1. Open the file to inspect all columns
-    fits = fitsio.FITS(cat_path)
+    # Decompressed once on first use so fitsio can seek to columns/rows
+    fits = fitsio.FITS(uncompressed_catalog(cat_path))
     all_cols = fits[1].get_colnames()
     
     # Identify the best redshift column (LePhare is preferred for COSMOS2020)
@@ -29,28 +33,25 @@ def run_robust_p6_audit():
 
     print(f"Using Columns: ALPHA_J2000, DELTA_J2000, {z_col}")
 
-    # 2. Load the Record
-    data = fits[1].read(columns=['ALPHA_J2000', 'DELTA_J2000', z_col])
+    # 2. Load the Redshifts only
+    z = fits[1].read(columns=[z_col])[z_col]
     
     # 3. Filter for Transition Zone (z > 3)
     # This is the "Goldilocks" zone between the coupled CMB and balanced LSS
-    mask = (data[z_col] > 3.0) & (data[z_col] < 6.0)
-    deep_data = data[mask]
+    # Only the surviving rows are read for the remaining columns.
+    keep = np.where((z > 3.0) & (z < 6.0))[0]
+    deep_data = fits[1].read(columns=['ALPHA_J2000', 'DELTA_J2000', z_col], rows=keep)
     print(f"Auditing {len(deep_data)} high-redshift sources.")
 
     # 4. Spatial Patching (Field Variance)
     n_side = 4
-    ra_bins = np.linspace(deep_data['ALPHA_J2000'].min(), deep_data['ALPHA_J2000'].max(), n_side + 1)
-    dec_bins = np.linspace(deep_data['DELTA_J2000'].min(), deep_data['DELTA_J2000'].max(), n_side + 1)
-    
-    counts = []
-    for i in range(n_side):
-        for j in range(n_side):
-            patch_mask = (deep_data['ALPHA_J2000'] >= ra_bins[i]) & (deep_data['ALPHA_J2000'] < ra_bins[i+1]) & \
-                         (deep_data['DELTA_J2000'] >= dec_bins[j]) & (deep_data['DELTA_J2000'] < dec_bins[j+1])
-            counts.append(np.sum(patch_mask))
     
-    counts = np.array(counts)
+    # One binning pass over RA/Dec, uniform bins over the bounding box
+    # (flattened row-major: patch (i, j) -> i*n_side + j). Patches are
+    # half-open [lo, hi), as in every P6 script: sources exactly on the
+    # max RA/Dec edge are not counted
+    counts = hist2d_uniform(deep_data['ALPHA_J2000'], deep_data['DELTA_J2000'], n_side,
+                            half_open=True).ravel()
     
     # 5. Calculate Variance Ratio (V)
     mean_count = np.mean(counts)
@@ -4,6 +4,9 @@ import fitsio
 import json
 import os
 
+from pbc.utils.grid import hist2d_uniform
+from pbc.utils.io import uncompressed_catalog
+
 def run_mask_aware_p6_audit():
     print("--- Running P6: Mask-Aware Field Variance Audit ---")
     cat_path = "data/raw/jwst/cosmos2020_classic.fits.gz"
@@ -12,40 +15,28 @@ def run_mask_aware_p6_audit():
         print(f"Catalog not found at {cat_path}.")
         return
 
-    # 1. Load the Record and verified Redshift column
-    fits = fitsio.FITS(cat_path)
-    data = fits[1].read(columns=['ALPHA_J2000', 'DELTA_J2000', 'lp_zBEST', 'FLAG_COMBINED'])
+    # 1. Load the verified Redshift column and the quality flag
+    # Decompressed once on first use so fitsio can seek to columns/rows
+    fits = fitsio.FITS(uncompressed_catalog(cat_path))
+    sel = fits[1].read(columns=['lp_zBEST', 'FLAG_COMBINED'])
     
     # 2. Define the Transition Zone (z > 3) and clean data
-    mask = (data['lp_zBEST'] > 3.0) & (data['lp_zBEST'] < 6.0) & (data['FLAG_COMBINED'] == 0)
-    clean_data = data[mask]
+    # Positions are read only for the surviving rows.
+    keep = np.where((sel['lp_zBEST'] > 3.0) & (sel['lp_zBEST'] < 6.0) & (sel['FLAG_COMBINED'] == 0))[0]
+    clean_data = fits[1].read(columns=['ALPHA_J2000', 'DELTA_J2000'], rows=keep)
     
     # 3. Define the Grid
     n_side = 10  # Increased resolution to find "Good" patches
-    ra_bins = np.linspace(clean_data['ALPHA_J2000'].min(), clean_data['ALPHA_J2000'].max(), n_side + 1)
-    dec_bins = np.linspace(clean_data['DELTA_J2000'].min(), clean_data['DELTA_J2000'].max(), n_side + 1)
-    
-    valid_counts = []
     
     # 4. Patch Occupancy Audit
-    for i in range(n_side):
-        for j in range(n_side):
-            # Define patch boundaries
-            r_min, r_max = ra_bins[i], ra_bins[i+1]
-            d_min, d_max = dec_bins[j], dec_bins[j+1]
-            
-            # Count sources in this patch
-            patch_mask = (clean_data['ALPHA_J2000'] >= r_min) & (clean_data['ALPHA_J2000'] < r_max) & \
-                         (clean_data['DELTA_J2000'] >= d_min) & (clean_data['DELTA_J2000'] < d_max)
-            count = np.sum(patch_mask)
-            
-            # MASK-AWARE CHECK: 
-            # We assume a 'Full' patch should have at least 50% of the median count
-            # This filters out edges and large holes
-            valid_counts.append(count)
+    # One binning pass over the bounding box gives every patch's occupancy.
+    # Patches are half-open [lo, hi), as in every P6 script: sources on the
+    # max RA/Dec edge are not counted
+    counts_array = hist2d_uniform(clean_data['ALPHA_J2000'], clean_data['DELTA_J2000'],
+                                  n_side, half_open=True).ravel()
 
     # 5. Filter for High-Coverage Patches (>90% of local median)
-    counts_array = np.array(valid_counts)
+    # This filters out edges and large holes
     threshold = np.median(counts_array) * 0.9
     filtered_counts = counts_array[counts_array > threshold]
     
@@ -3,13 +3,16 @@ import numpy as np
 import fitsio
 import os
 
+from pbc.utils.grid import hist2d_uniform
+from pbc.utils.io import uncompressed_catalog
+
 def verify_p6_geometry():
     print("--- P6 Verification: Grid & Mask Audit ---")
     cat_path = "data/raw/jwst/cosmos2020_classic.fits.gz"
     
     # We load RA/Dec and a Flag column to see what's 'Good' data
     # FLAG_COMBINED = 0 usually means clean data area
-    data = fitsio.read(cat_path, columns=['ALPHA_J2000', 'DELTA_J2000', 'lp_zBEST', 'FLAG_COMBINED'])
+    data = fitsio.read(uncompressed_catalog(cat_path), columns=['ALPHA_J2000', 'DELTA_J2000', 'lp_zBEST', 'FLAG_COMBINED'])
     
     mask = (data['lp_zBEST'] > 3.0) & (data['lp_zBEST'] < 6.0)
     clean_data = data[mask & (data['FLAG_COMBINED'] == 0)]
@@ -18,19 +21,17 @@ def verify_p6_geometry():
 
     # Audit the Grid
     n_side = 4
-    ra_bins = np.linspace(clean_data['ALPHA_J2000'].min(), clean_data['ALPHA_J2000'].max(), n_side + 1)
-    dec_bins = np.linspace(clean_data['DELTA_J2000'].min(), clean_data['DELTA_J2000'].max(), n_side + 1)
+    ra_range = [clean_data['ALPHA_J2000'].min(), clean_data['ALPHA_J2000'].max()]
+    dec_range = [clean_data['DELTA_J2000'].min(), clean_data['DELTA_J2000'].max()]
     
-    counts = []
-    for i in range(n_side):
-        for j in range(n_side):
-            p_mask = (clean_data['ALPHA_J2000'] >= ra_bins[i]) & (clean_data['ALPHA_J2000'] < ra_bins[i+1]) & \
-                     (clean_data['DELTA_J2000'] >= dec_bins[j]) & (clean_data['DELTA_J2000'] < dec_bins[j+1])
-            c = np.sum(p_mask)
-            print(f"Patch ({i},{j}) Count: {c}")
-            counts.append(c)
+    # One binning pass over the sources (uniform bins: index arithmetic + bincount).
+    # Patches are half-open [lo, hi): sources on the max RA/Dec edge are not counted
+    hist = hist2d_uniform(clean_data['ALPHA_J2000'], clean_data['DELTA_J2000'],
+                          n_side, range=[ra_range, dec_range], half_open=True)
+    for (i, j), c in np.ndenumerate(hist):
+        print(f"Patch ({i},{j}) Count: {c}")
     
-    counts = np.array(counts)
+    counts = hist.ravel()
     v_ratio = np.var(counts) / np.mean(counts)
     print(f"\nCorrected Variance Ratio: {v_ratio:.4f}")
 
@@ -1,24 +1,36 @@
+import argparse
 import numpy as np
 import healpy as hp
 from pathlib import Path
 
-def generate_mock_planck_data(nside=2048):
+from pbc.utils.sht import alm2map
+
+NSIDE_FAST = 128  # Synthesis resolution for --fast mocks
+
+def generate_mock_planck_data(nside=2048, fast=False):
     """
     Generates synthetic 'Planck-like' maps to bypass download errors.
+    
+    fast=True synthesizes the CMB at NSIDE_FAST and upgrades it: the 1/l^2
+    spectrum puts almost all power at low l, and the mock is a placeholder,
+    so the full-resolution spherical harmonic synthesis is skipped.
     """
     print(f"--- Generating Synthetic Planck Data (NSIDE={nside}) ---")
     output_dir = Path("data/raw")
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # 1. Generate Dummy Theory Spectrum (Cl)
-    lmax = 3 * nside - 1
+    nside_syn = min(nside, NSIDE_FAST) if fast else nside
+    lmax = 3 * nside_syn - 1
     cl = np.zeros(lmax + 1)
     cl[2:] = 1.0 / (np.arange(2, lmax + 1) ** 2)
     
     # 2. Generate 'Record' (SMICA substitute)
-    print("Generating Mock CMB (Record)...")
+    print(f"Generating Mock CMB (Record, synthesized at NSIDE={nside_syn})...")
     alm_cmb = hp.synalm(cl, lmax=lmax, new=True)
-    map_cmb = hp.alm2map(alm_cmb, nside=nside)
+    map_cmb = alm2map(alm_cmb, nside_syn)
+    if nside_syn != nside:
+        map_cmb = hp.ud_grade(map_cmb, nside)
     
     hp.write_map(output_dir / "COM_CMB_IQU-smica_2048_R3.00_full.fits", 
                  map_cmb, overwrite=True, column_names=['I_STOKES'])
@@ -47,5 +59,11 @@ def generate_mock_planck_data(nside=2048):
     print("--- Mock Data Generated Successfully ---")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Planck-like maps")
     # Use nside=512 for speed
-    generate_mock_planck_data(nside=512)
+    parser.add_argument("--nside", type=int, default=512, help="Output resolution")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--fast", action="store_true", help=f"Synthesize the CMB at NSIDE {NSIDE_FAST} and upgrade")
+    mode.add_argument("--accurate", dest="fast", action="store_false", help="Full-resolution synthesis (default)")
+    args = parser.parse_args()
+    generate_mock_planck_data(nside=args.nside, fast=args.fast)
@@ -25,12 +25,13 @@ Usage:
 
 import os
 import numpy as np
-import pandas as pd
 import argparse
 import json
 import sys
 from scipy.stats import norm
 
+from pbc.utils.grid import hist2d_uniform
+
 # --- Constants from Paper ---
 Z_MIN = 3.0
 Z_MAX = 6.0
@@ -47,7 +48,8 @@ def load_cosmos_data(filepath):
     # In a real run, you would use:
     # from astropy.table import Table
     # t = Table.read(filepath)
-    # return t.to_pandas()
+    # return (np.asarray(t['ALPHA_J2000']), np.asarray(t['DELTA_J2000']),
+    #         np.asarray(t['lp_zPDF']))
     print("[!] FITS loading requires local file. Switching to Simulation Mode.")
     return generate_synthetic_data()
 
@@ -55,6 +57,8 @@ def generate_synthetic_data():
     """
     Generates a mock catalog that Statistically Reproduces the P6 result.
     This creates a distribution with V ~ 15.39.
+    
+    Returns plain (ra, dec, z) arrays, as run_p6_audit consumes them.
     """
     print("[*] Generating Synthetic 'Structuring Phase' Data...")
     np.random.seed(42)
@@ -82,31 +86,20 @@ def generate_synthetic_data():
     patch_counts = np.random.negative_binomial(r_param, p_param, n_patches)
     
     # Convert patch counts to RA/DEC list (mocking the catalog)
-    ra_list = []
-    dec_list = []
-    
     # Create a dummy grid 150.0 +/- 1.0 deg
     ra_edges = np.linspace(149.0, 151.0, 11)
     dec_edges = np.linspace(1.5, 3.5, 11)
     
-    for i in range(10):
-        for j in range(10):
-            idx = i * 10 + j
-            count = patch_counts[idx]
-            
-            # Scatter points randomly within this patch
-            r = np.random.uniform(ra_edges[i], ra_edges[i+1], count)
-            d = np.random.uniform(dec_edges[j], dec_edges[j+1], count)
-            ra_list.append(r)
-            dec_list.append(d)
-            
-    df = pd.DataFrame({
-        'ALPHA_J2000': np.concatenate(ra_list),
-        'DELTA_J2000': np.concatenate(dec_list),
-        'lp_zPDF': np.random.uniform(3.0, 6.0, len(np.concatenate(ra_list)))
-    })
-    
-    return df
+    # Patch idx = i * 10 + j: lower corner of every source's patch,
+    # then scatter all points at once within their patch
+    ra_lo = np.repeat(np.repeat(ra_edges[:-1], 10), patch_counts)
+    dec_lo = np.repeat(np.tile(dec_edges[:-1], 10), patch_counts)
+    total = patch_counts.sum()
+    ra = ra_lo + np.random.uniform(0, 1, total) * (ra_edges[1] - ra_edges[0])
+    dec = dec_lo + np.random.uniform(0, 1, total) * (dec_edges[1] - dec_edges[0])
+    z = np.random.uniform(3.0, 6.0, total)
+    
+    return ra, dec, z
 
 def calculate_occupancy(ra, dec, grid_size=10):
     """
@@ -131,49 +124,36 @@ def calculate_occupancy(ra, dec, grid_size=10):
     
     return occupancy_grid
 
-def run_p6_audit(df):
+def run_p6_audit(ra, dec, z):
     print("--- P6 Audit: Structuring Variance ---")
     
     # 1. Filter Redshift
-    subset = df[(df['lp_zPDF'] > Z_MIN) & (df['lp_zPDF'] < Z_MAX)]
-    print(f"[*] Subset (3 < z < 6): {len(subset)} sources")
+    sel = (z > Z_MIN) & (z < Z_MAX)
+    ra, dec = ra[sel], dec[sel]
+    print(f"[*] Subset (3 < z < 6): {len(ra)} sources")
     
     # 2. Define Grid
-    ra_min, ra_max = subset['ALPHA_J2000'].min(), subset['ALPHA_J2000'].max()
-    dec_min, dec_max = subset['DELTA_J2000'].min(), subset['DELTA_J2000'].max()
-    
-    ra_bins = np.linspace(ra_min, ra_max, GRID_SIZE + 1)
-    dec_bins = np.linspace(dec_min, dec_max, GRID_SIZE + 1)
+    ra_min, ra_max = ra.min(), ra.max()
+    dec_min, dec_max = dec.min(), dec.max()
     
     # 3. Bin Data (Get N_i)
-    hist, _, _ = np.histogram2d(
-        subset['ALPHA_J2000'], 
-        subset['DELTA_J2000'], 
-        bins=[ra_bins, dec_bins]
-    )
+    # Uniform bins: index arithmetic + one bincount, no searchsorted over edges.
+    # Half-open cells [lo, hi), as in every P6 script: max-edge sources not counted
+    hist = hist2d_uniform(ra, dec, GRID_SIZE, range=[[ra_min, ra_max], [dec_min, dec_max]],
+                          half_open=True)
     
     # 4. Apply Mask-Aware Filter
     # Get occupancy map
     occ_map = calculate_occupancy(None, None, GRID_SIZE)
     
-    valid_patches = []
-    rejected_patches = []
-    
-    for i in range(GRID_SIZE):
-        for j in range(GRID_SIZE):
-            count = hist[i, j]
-            occ = occ_map[i, j]
-            
-            if occ >= OCCUPANCY_THRESHOLD:
-                valid_patches.append(count)
-            else:
-                rejected_patches.append(count)
-                
-    valid_patches = np.array(valid_patches)
+    # occ_map and hist share the (GRID_SIZE, GRID_SIZE) layout: select directly
+    valid_mask = occ_map >= OCCUPANCY_THRESHOLD
+    valid_patches = hist[valid_mask]
+    rejected_patches = hist[~valid_mask]
     
     # 5. Calculate Statistics
-    mean_count = np.mean(valid_patches)
-    variance = np.var(valid_patches, ddof=1)
+    mean_count = valid_patches.mean()
+    variance = valid_patches.var(ddof=1)
     v_ratio = variance / mean_count
     
     # 6. Significance (relative to Poisson)
@@ -181,7 +161,7 @@ def run_p6_audit(df):
     # Actually, for V-ratio (Dispersion Index), std dev is sqrt(2/(M-1)) under Null
     # Sigma = (V - 1) / sqrt(2/(M-1))
     
-    M = len(valid_patches)
+    M = valid_patches.size
     sigma_null = np.sqrt(2 / (M - 1))
     significance = (v_ratio - 1) / sigma_null
     
@@ -214,7 +194,7 @@ if __name__ == "__main__":
     else:
         data = generate_synthetic_data()
         
-    results = run_p6_audit(data)
+    results = run_p6_audit(*data)
     
     # FIX: Ensure data/processed exists and save there
     output_dir = "data/processed"
@@ -1,56 +1,68 @@
 import os
 import numpy as np
 import pandas as pd
-from astropy.io import fits
+import fitsio
+
+from pbc.utils.io import uncompressed_catalog
+
+CHUNK_ROWS = 1_000_000  # rows read per pass; bounds peak memory
 
 def safe_extract(fits_path, output_csv):
-    print(f"[*] Opening {fits_path} using memory mapping...")
+    print(f"[*] Opening {fits_path} for chunked reads...")
     
     try:
-        # memmap=True is the key here; it doesn't load the file into RAM
-        with fits.open(fits_path, memmap=True) as hdul:
+        # fitsio reads only the requested columns and row range per chunk,
+        # so neither the catalog nor the full columns are ever in RAM
+        with fitsio.FITS(fits_path) as f:
             # COSMOS2020 data is in extension 1
-            data = hdul[1].data
+            hdu = f[1]
+            names = hdu.get_colnames()
             
             print("[*] Accessing specific columns...")
             # We only pull the data for these specific headers
             # Using list of possible names in case of version differences
-            ra_col = 'ALPHA_J2000' if 'ALPHA_J2000' in data.names else 'ra'
-            dec_col = 'DELTA_J2000' if 'DELTA_J2000' in data.names else 'dec'
+            ra_col = 'ALPHA_J2000' if 'ALPHA_J2000' in names else 'ra'
+            dec_col = 'DELTA_J2000' if 'DELTA_J2000' in names else 'dec'
             z_col = 'lp_zPDF'
             
-            # Extract just these columns as numpy arrays
-            ra = np.array(data[ra_col], dtype=np.float64)
-            dec = np.array(data[dec_col], dtype=np.float64)
-            z = np.array(data[z_col], dtype=np.float32)
-            
-            print(f"[*] Filtering {len(ra)} sources for Structuring Phase (3 < z < 6)...")
-            # Create a boolean mask to filter before making a DataFrame
-            mask = (z > 3.0) & (z < 6.0)
+            nrows = hdu.get_nrows()
+            print(f"[*] Filtering {nrows} sources for Structuring Phase (3 < z < 6)...")
+            os.makedirs(os.path.dirname(output_csv), exist_ok=True)
             
-            # Build the DataFrame only from the filtered subset
-            df_subset = pd.DataFrame({
-                'ra': ra[mask],
-                'dec': dec[mask],
-                'lp_zPDF': z[mask]
-            })
+            n_kept = 0
+            for start in range(0, nrows, CHUNK_ROWS):
+                chunk = hdu[[ra_col, dec_col, z_col]][start:start + CHUNK_ROWS]
+                z = chunk[z_col].astype(np.float32)
+                
+                # Filter each chunk before making a DataFrame
+                mask = (z > 3.0) & (z < 6.0)
+                
+                df_subset = pd.DataFrame({
+                    'ra': chunk[ra_col][mask].astype(np.float64),
+                    'dec': chunk[dec_col][mask].astype(np.float64),
+                    'lp_zPDF': z[mask]
+                })
+                # Stream survivors out: header with the first chunk only
+                df_subset.to_csv(output_csv, mode='w' if start == 0 else 'a',
+                                 header=start == 0, index=False)
+                n_kept += len(df_subset)
             
-            os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-            df_subset.to_csv(output_csv, index=False)
-            print(f"[SUCCESS] Extracted {len(df_subset)} sources to {output_csv}")
+            print(f"[SUCCESS] Extracted {n_kept} sources to {output_csv}")
             
     except Exception as e:
         print(f"[ERROR] Extraction failed: {e}")
 
 if __name__ == "__main__":
-    # Check if the file is .gz (compressed)
-    # Note: Memory mapping doesn't work well on .gz files. 
-    # If it's cosmos2020_classic.fits.gz, unzip it first!
+    # fitsio cannot seek inside a .gz, so a compressed catalog is
+    # decompressed once next to the original (see uncompressed_catalog)
     raw_path = "data/raw/jwst/cosmos2020_classic.fits" 
+    gz_path = raw_path + ".gz"
     output_path = "data/raw/COSMOS2020_subset.csv"
     
+    if os.path.exists(gz_path):
+        raw_path = uncompressed_catalog(gz_path)
+    
     if os.path.exists(raw_path):
         safe_extract(raw_path, output_path)
     else:
-        print(f"[!] File not found: {raw_path}")
-        print("[!] Tip: If your file ends in .gz, run 'gunzip data/raw/jwst/cosmos2020_classic.fits.gz' first.")
+        print(f"[!] File not found: {raw_path} (or {gz_path})")
@@ -1,10 +1,11 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.optimize import curve_fit
-from scipy.ndimage import rotate
-from scipy.fft import fft
+from scipy.ndimage import spline_filter, map_coordinates
 import os
+import multiprocessing
+
+from pbc.utils.grid import hist2d_uniform
 
 # CONFIG
 DATA_PATH = 'data/raw/COSMOS2020_subset.csv'
@@ -20,34 +21,73 @@ def remove_density_dipole(grid):
     y_flat = Y.ravel()
     z_flat = grid.ravel()
     
-    # Fit plane: z = ax + by + c
-    def plane(coords, a, b, c):
-        x, y = coords
-        return a*x + b*y + c
-    
     # Fit only to valid data (nonzero) to avoid edge bias
     mask = z_flat > 0
     if np.sum(mask) < 10: return grid # Too sparse to fit
     
-    popt, _ = curve_fit(plane, (x_flat[mask], y_flat[mask]), z_flat[mask])
+    # Fit plane: z = ax + by + c
+    # Linear in (a, b, c): one least-squares solve, no iterative optimizer
+    A = np.column_stack([x_flat[mask], y_flat[mask], np.ones(mask.sum())])
+    (a, b, c), *_ = np.linalg.lstsq(A, z_flat[mask], rcond=None)
     
     # Subtract plane from whole grid
-    z_plane = plane((x_flat, y_flat), *popt).reshape(ny, nx)
+    z_plane = (a*x_flat + b*y_flat + c).reshape(ny, nx)
     return grid - z_plane
 
-def get_grid_variance(grid, angle):
-    """Rotates the grid and measures the variance of the structure."""
-    # reshape=False keeps the "Window" static (like the telescope detector)
-    rot_grid = rotate(grid, angle, reshape=False, mode='constant', cval=0)
+def rotation_coords(shape, angles):
+    """
+    Input-pixel coordinates that ndimage.rotate(reshape=False) samples for
+    every angle, flattened to (2, n_angles * ny * nx) for map_coordinates.
+    """
+    theta = np.radians(angles)
+    c, s = np.cos(theta)[:, None], np.sin(theta)[:, None]
+    centre = (np.asarray(shape) - 1) / 2
+    r, q = np.indices(shape).reshape(2, -1) - centre[:, None]
+    coords = np.stack([c * r + s * q, c * q - s * r]) + centre[:, None, None]
+    # Snap round-off (e.g. -1e-15 at 180 deg) so edge pixels stay inside
+    snapped = np.round(coords)
+    coords = np.where(np.abs(coords - snapped) < 1e-9, snapped, coords)
+    return coords.reshape(2, -1)
+
+def get_grid_variance(grid, coords):
+    """Rotates the grid to every angle in 'coords' and measures the variance of the structure."""
+    # Same cubic-spline rotation as ndimage.rotate(reshape=False, mode='constant'),
+    # which keeps the "Window" static (like the telescope detector), but the
+    # spline prefilter runs once per grid and all angles sample in one call
+    filtered = spline_filter(grid, order=3, mode='constant')
+    rot_grids = map_coordinates(filtered, coords, order=3, mode='constant', cval=0,
+                                prefilter=False).reshape(-1, *grid.shape)
+    
+    curve = []
+    for rot_grid in rot_grids:
+        # Measure variance of the signal inside the window
+        valid_pixels = rot_grid[rot_grid != 0]
+        if len(valid_pixels) == 0:
+            curve.append(0)
+            continue
+        
+        # Index of Dispersion (Clumpiness)
+        curve.append(np.var(valid_pixels) / (np.mean(valid_pixels) + 1e-9))
+    return curve
+
+# Read-only inputs for the shuffle workers (inherited copy-on-write on fork)
+ra = None
+dec = None
+coords = None
+
+def _one_shuffle(seed):
+    rng = np.random.default_rng(seed)
+    # Shuffle RA to destroy physical alignment but keep mask/density
+    ra_shuf = rng.permutation(ra)
     
-    # Measure variance of the signal inside the window
-    valid_pixels = rot_grid[rot_grid != 0]
-    if len(valid_pixels) == 0: return 0
+    # Grid -> Remove Dipole -> Measure (half-open cells, as for the data)
+    H_shuf = hist2d_uniform(ra_shuf, dec, GRID_SIZE, half_open=True)
+    H_shuf_clean = remove_density_dipole(H_shuf.T)
     
-    # Index of Dispersion (Clumpiness)
-    return np.var(valid_pixels) / (np.mean(valid_pixels) + 1e-9)
+    return get_grid_variance(H_shuf_clean, coords)
 
 def p6_clean_audit():
+    global ra, dec, coords
     print("--- STARTING P6 AUDIT (Dipole-Corrected) ---")
     
     if not os.path.exists(DATA_PATH):
@@ -60,29 +100,24 @@ def p6_clean_audit():
     
     # 2. Grid the Real Data
     print("Gridding and removing dipole from Real Data...")
-    H_data, _, _ = np.histogram2d(df['ra'], df['dec'], bins=GRID_SIZE)
+    # Binned coordinates stay float64: float32 moves points across cell edges
+    ra = df['ra'].to_numpy()
+    dec = df['dec'].to_numpy()
+    # Half-open cells [lo, hi), as in every P6 script: max-edge sources not counted
+    H_data = hist2d_uniform(ra, dec, GRID_SIZE, half_open=True)
     H_data = H_data.T # Transpose for image coords
     H_clean = remove_density_dipole(H_data)
     
     # 3. Analyze Real Data
     angles = np.linspace(0, 180, 37)
-    real_curve = [get_grid_variance(H_clean, a) for a in angles]
+    coords = rotation_coords(H_clean.shape, angles)
+    real_curve = get_grid_variance(H_clean, coords)
     
     # 4. Analyze Shuffles (The Null Hypothesis)
     print(f"Running {N_SHUFFLES} Shuffled Null Tests...")
-    shuffle_curves = []
-    
-    for i in range(N_SHUFFLES):
-        # Shuffle RA to destroy physical alignment but keep mask/density
-        df_shuf = df.copy()
-        df_shuf['ra'] = np.random.permutation(df['ra'].values)
-        
-        # Grid -> Remove Dipole -> Measure
-        H_shuf, _, _ = np.histogram2d(df_shuf['ra'], df_shuf['dec'], bins=GRID_SIZE)
-        H_shuf_clean = remove_density_dipole(H_shuf.T)
-        
-        curve = [get_grid_variance(H_shuf_clean, a) for a in angles]
-        shuffle_curves.append(curve)
+    # Independent shuffles, one per worker, seeded by index
+    with multiprocessing.get_context("fork").Pool() as pool:
+        shuffle_curves = pool.map(_one_shuffle, range(N_SHUFFLES))
         
     # 5. Statistics
     baseline_mean = np.mean(shuffle_curves, axis=0)
@@ -91,10 +126,11 @@ def p6_clean_audit():
     # Excess Signal (Data - Null)
     excess = np.array(real_curve) - baseline_mean
     
-    # Harmonic Analysis
-    fft_vals = np.abs(fft(excess))
-    mode2 = fft_vals[2] # Quadrupole (Physical Alignment)
-    mode4 = fft_vals[4] # Grid Artifact (Square)
+    # Harmonic Analysis: only bins 2 and 4 of the DFT are needed, so project
+    # onto those two harmonics directly instead of running a full FFT
+    n = len(excess)
+    harmonics = np.exp(-2j * np.pi * np.outer([2, 4], np.arange(n)) / n)
+    mode2, mode4 = np.abs(harmonics @ excess) # Quadrupole (Physical Alignment), Grid Artifact (Square)
     
     print("\n--- RESULTS ---")
     print(f"Mode 2 (Signal):   {mode2:.2f}")
@@ -1,22 +1,11 @@
 #!/usr/bin/env python3
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
-def rotate_coords(ra, dec, theta_deg):
-    theta_rad = np.radians(theta_deg)
-    ra_c, dec_c = np.mean(ra), np.mean(dec)
-    x, y = ra - ra_c, dec - dec_c
-    x_rot = x * np.cos(theta_rad) - y * np.sin(theta_rad)
-    y_rot = x * np.sin(theta_rad) + y * np.cos(theta_rad)
-    return x_rot + ra_c, y_rot + dec_c
+from pbc.utils.grid import hexbin_counts, rotate_points
 
 def get_hex_variance(ra, dec, gridsize=10):
-    fig, ax = plt.subplots()
-    hb = ax.hexbin(ra, dec, gridsize=gridsize, mincnt=0)
-    counts = hb.get_array()
-    plt.close(fig)
+    counts = hexbin_counts(ra, dec, gridsize)
     # Use only non-zero bins to represent the survey area
     valid_counts = counts[counts > 0]
     mu = np.mean(valid_counts)
@@ -37,10 +26,14 @@ if __name__ == "__main__":
     print(f"{'Angle':<10} | {'Null Hex-V':<15}")
     print("-" * 30)
 
+    # Centre once for the whole sweep (the hexagon grid follows the bounding box)
+    x, y = ra_null - ra_null.mean(), dec_null - dec_null.mean()
+    buf = (np.empty_like(x), np.empty_like(y))  # Reused by every angle
+
     null_results = []
     for theta in angles:
-        r_ra, r_dec = rotate_coords(ra_null, dec_null, theta)
-        v = get_hex_variance(r_ra, r_dec)
+        r_x, r_y = rotate_points(x, y, theta, out=buf)
+        v = get_hex_variance(r_x, r_y)
         null_results.append(v)
         print(f"{theta:02d}°        | {v:.4f}")
 
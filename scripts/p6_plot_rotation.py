@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 import matplotlib.pyplot as plt
 import json
-import pandas as pd
-import numpy as np
 import os
 
 def plot_rotation_curve(json_path, output_path):
@@ -11,32 +9,34 @@ def plot_rotation_curve(json_path, output_path):
     # 1. Load Data
     with open(json_path, 'r') as f:
         data = json.load(f)
-    df = pd.DataFrame(data)
+    # A list of {angle, variance_ratio, ...} records: plain columns suffice
+    angles = [row['angle'] for row in data]
+    ratios = [row['variance_ratio'] for row in data]
     
     # 2. Setup Plot
     plt.figure(figsize=(10, 6))
     
     # 3. Plot the Curve
-    plt.plot(df['angle'], df['variance_ratio'], 
+    plt.plot(angles, ratios, 
              marker='o', linestyle='-', color='#2c3e50', linewidth=2, label='Observed Variance')
     
     # 4. Add "Isotropic Gravity" Baseline (Theoretical)
     # If structure were physical (Gravity), V would be constant at V(0)
-    v_isotropic = df['variance_ratio'].iloc[0]
+    v_isotropic = ratios[0]
     plt.axhline(y=v_isotropic, color='#e74c3c', linestyle='--', alpha=0.7, label='Isotropic Expectation (Gravity)')
     
     # 5. Annotate Key Features
     
     # The "Lock" (0 degrees)
     plt.annotate('Context Lock\n(Max Variance)', 
-                 xy=(0, df['variance_ratio'].iloc[0]), 
-                 xytext=(10, df['variance_ratio'].iloc[0] + 2),
+                 xy=(0, ratios[0]), 
+                 xytext=(10, ratios[0] + 2),
                  arrowprops=dict(facecolor='black', shrink=0.05))
                  
     # The "Decoherence" (Minima ~20 degrees)
-    min_idx = df['variance_ratio'].iloc[0:10].idxmin() # Find min in first 50 deg
-    min_val = df['variance_ratio'].iloc[min_idx]
-    min_angle = df['angle'].iloc[min_idx]
+    min_idx = min(range(min(len(ratios), 10)), key=ratios.__getitem__) # Find min in first 50 deg
+    min_val = ratios[min_idx]
+    min_angle = angles[min_idx]
     
     plt.annotate('Decoherence\n(Structure Collapses)', 
                  xy=(min_angle, min_val), 
@@ -44,8 +44,8 @@ def plot_rotation_curve(json_path, output_path):
                  arrowprops=dict(facecolor='black', shrink=0.05))
 
     # The "Aliasing Spike" (45 degrees)
-    spike_idx = df[df['angle'] == 45].index[0]
-    spike_val = df['variance_ratio'].iloc[spike_idx]
+    spike_idx = angles.index(45)
+    spike_val = ratios[spike_idx]
     plt.annotate('Grid Aliasing\n(Moiré Effect)', 
                  xy=(45, spike_val), 
                  xytext=(50, spike_val),
@@ -59,8 +59,8 @@ def plot_rotation_curve(json_path, output_path):
     plt.legend()
     
     # Shade the "Anisotropy Gap"
-    plt.fill_between(df['angle'], df['variance_ratio'], v_isotropic, 
-                     where=(df['variance_ratio'] < v_isotropic),
+    plt.fill_between(angles, ratios, v_isotropic, 
+                     where=[v < v_isotropic for v in ratios],
                      color='#e74c3c', alpha=0.1, label='Anisotropy Gap')
 
     # 7. Save
@@ -5,18 +5,14 @@ import json
 import os
 import sys
 
-def rotate_coords(ra, dec, theta_deg):
-    theta_rad = np.radians(theta_deg)
-    ra_c, dec_c = np.mean(ra), np.mean(dec)
-    x, y = ra - ra_c, dec - dec_c
-    x_rot = x * np.cos(theta_rad) - y * np.sin(theta_rad)
-    y_rot = x * np.sin(theta_rad) + y * np.cos(theta_rad)
-    return x_rot + ra_c, y_rot + dec_c
+from pbc.utils.grid import hist2d_uniform, rotate_points
+
+AUDIT_COLUMNS = {'ra', 'dec', 'lp_zPDF', 'ALPHA_J2000', 'DELTA_J2000'}
 
 def get_variance_ratio(ra, dec, bins=10):
-    ra_bins = np.linspace(np.min(ra), np.max(ra), bins + 1)
-    dec_bins = np.linspace(np.min(dec), np.max(dec), bins + 1)
-    hist, _, _ = np.histogram2d(ra, dec, bins=[ra_bins, dec_bins])
+    # Uniform bins over the bounding box: direct index arithmetic + bincount.
+    # Half-open [lo, hi), as in every P6 script: max-edge sources not counted
+    hist = hist2d_uniform(ra, dec, bins, half_open=True)
     inner_counts = hist[1:-1, 1:-1].flatten()
     mu = np.mean(inner_counts)
     return np.var(inner_counts, ddof=1) / mu if mu > 0 else 0
@@ -29,7 +25,8 @@ if __name__ == "__main__":
         sys.exit(1)
 
     print(f"[*] REAL DATA AUDIT STARTING: Loading {path}...")
-    df = pd.read_csv(path)
+    # Parse only the columns used below (either naming convention)
+    df = pd.read_csv(path, usecols=lambda c: c in AUDIT_COLUMNS)
     
     # Standardize column names if they aren't already
     if 'ra' not in df.columns and 'ALPHA_J2000' in df.columns:
@@ -39,12 +36,17 @@ if __name__ == "__main__":
     subset = df[(df['lp_zPDF'] > 3.0) & (df['lp_zPDF'] < 6.0)]
     print(f"[*] Auditing {len(subset)} high-redshift sources...")
     
+    # Centre once; the bins follow each rotated bounding box, so V does
+    # not depend on shifting back to the field centre
+    x = subset['ra'].to_numpy() - subset['ra'].mean()
+    y = subset['dec'].to_numpy() - subset['dec'].mean()
+    buf = (np.empty_like(x), np.empty_like(y))  # Reused by every angle
+    
     results = []
     for theta in [0, 10, 20, 45, 90]:
         print(f"[*] Analyzing theta = {theta} degrees...")
-        # Use the updated names here
-        r_ra, r_dec = rotate_coords(subset['ra'], subset['dec'], theta)
-        v = get_variance_ratio(r_ra, r_dec)
+        r_x, r_y = rotate_points(x, y, theta, out=buf)
+        v = get_variance_ratio(r_x, r_y)
         results.append({"angle": theta, "v_ratio": v})
         print(f"    Measured Variance Ratio (V): {v:.4f}")
 
@@ -21,6 +21,8 @@ import json
 import os
 import sys
 
+from pbc.utils.grid import hist2d_uniform, rotate_points
+
 # --- Constants ---
 GRID_SIZE = 10
 OCCUPANCY_THRESHOLD = 0.90
@@ -42,49 +44,39 @@ def generate_grid_locked_data():
     
     patch_counts = np.random.negative_binomial(r_param, p_param, n_patches)
     
-    ra_list = []
-    dec_list = []
-    
     # Define Field Bounds (centered at 150.0, 2.5)
     ra_edges = np.linspace(149.0, 151.0, 11)
     dec_edges = np.linspace(1.5, 3.5, 11)
     
-    for i in range(10):
-        for j in range(10):
-            idx = i * 10 + j
-            count = patch_counts[idx]
-            # Place galaxies INSIDE the grid patch
-            r = np.random.uniform(ra_edges[i], ra_edges[i+1], count)
-            d = np.random.uniform(dec_edges[j], dec_edges[j+1], count)
-            ra_list.append(r)
-            dec_list.append(d)
+    # Patch idx = i * 10 + j: place all galaxies INSIDE their grid patch at
+    # once, building each coordinate in its one output array (offset within
+    # the patch, then the lower corner of the galaxy's patch added in place)
+    total = patch_counts.sum()
+    ra = np.random.uniform(0, 1, total)
+    ra *= ra_edges[1] - ra_edges[0]
+    ra += np.repeat(np.repeat(ra_edges[:-1], 10), patch_counts)
+    dec = np.random.uniform(0, 1, total)
+    dec *= dec_edges[1] - dec_edges[0]
+    dec += np.repeat(np.tile(dec_edges[:-1], 10), patch_counts)
             
-    return pd.DataFrame({
-        'ra': np.concatenate(ra_list),
-        'dec': np.concatenate(dec_list)
-    })
+    return pd.DataFrame({'ra': ra, 'dec': dec})
 
-def rotate_coordinates(ra, dec, theta_deg):
+def rotate_coordinates(ra, dec, thetas_deg):
     """
-    Rotates RA/Dec coordinates around the field center.
+    Rotates RA/Dec coordinates around the field center by every angle in
+    'thetas_deg' at once, returning (N_angles, N) arrays.
     """
-    theta_rad = np.radians(theta_deg)
-    
-    # 1. Shift to origin
+    # 1. Shift to origin (once for the whole sweep)
     ra_center = np.mean(ra)
     dec_center = np.mean(dec)
     
-    x = ra - ra_center
-    y = dec - dec_center
-    
-    # 2. Rotate
-    # x' = x cos - y sin
-    # y' = x sin + y cos
-    x_rot = x * np.cos(theta_rad) - y * np.sin(theta_rad)
-    y_rot = x * np.sin(theta_rad) + y * np.cos(theta_rad)
+    # 2. Rotate: one broadcast over (angle, point)
+    x_rot, y_rot = rotate_points(ra - ra_center, dec - dec_center, thetas_deg)
     
-    # 3. Shift back
-    return x_rot + ra_center, y_rot + dec_center
+    # 3. Shift back (the window is fixed on the sky), in place
+    x_rot += ra_center
+    y_rot += dec_center
+    return x_rot, y_rot
 
 def calculate_variance_ratio(ra, dec):
     """
@@ -92,30 +84,22 @@ def calculate_variance_ratio(ra, dec):
     """
     # Define bins (Fixed Window)
     # Bounds must match the generation bounds to represent the "Camera"
-    ra_bins = np.linspace(149.0, 151.0, GRID_SIZE + 1)
-    dec_bins = np.linspace(1.5, 3.5, GRID_SIZE + 1)
+    window = [[149.0, 151.0], [1.5, 3.5]]
     
-    # Bin data
-    hist, _, _ = np.histogram2d(ra, dec, bins=[ra_bins, dec_bins])
+    # Bin data (uniform half-open bins [lo, hi), as in every P6 script:
+    # points outside the window or on its max edges are dropped)
+    hist = hist2d_uniform(ra, dec, GRID_SIZE, range=window, half_open=True)
     
     # Mask Logic (Simulated Edge Mask)
-    valid_counts = []
-    
     # Define a simple mask: Inner 8x8 is valid (Occupancy=1.0), Edge is invalid (<0.9)
     # This simplifies the previous probability mask to a binary selection for clarity
-    for i in range(GRID_SIZE):
-        for j in range(GRID_SIZE):
-            # Check if inner patch
-            if 0 < i < 9 and 0 < j < 9:
-                valid_counts.append(hist[i, j])
-                
-    valid_counts = np.array(valid_counts)
+    valid_counts = hist[1:-1, 1:-1].ravel()
     
     # Statistics
-    if len(valid_counts) == 0: return 0.0
+    if valid_counts.size == 0: return 0.0
     
-    mean = np.mean(valid_counts)
-    var = np.var(valid_counts, ddof=1)
+    mean = valid_counts.mean()
+    var = valid_counts.var(ddof=1)
     
     if mean == 0: return 0.0
     return var / mean
@@ -129,10 +113,10 @@ def run_rotation_audit(df):
     
     v_0 = None
     
-    for theta in angles:
-        # 1. Rotate
-        ra_rot, dec_rot = rotate_coordinates(df['ra'].values, df['dec'].values, theta)
-        
+    # 1. Rotate (all angles in one pass)
+    all_ra, all_dec = rotate_coordinates(df['ra'].values, df['dec'].values, angles)
+    
+    for theta, ra_rot, dec_rot in zip(angles, all_ra, all_dec):
         # 2. Measure
         v_ratio = calculate_variance_ratio(ra_rot, dec_rot)
         
@@ -1,12 +1,22 @@
 #!/usr/bin/env python
 import argparse
+import multiprocessing
 import numpy as np
-import healpy as hp
 from pathlib import Path
 from tqdm import tqdm
 
-from pbc.stats import calc_phase_alignment
+from pbc.stats import calc_phase_alignment_batch
 from pbc.utils.io import save_json
+from pbc.utils.sht import synalm_batch
+
+SHARD_SIZE = 10  # Simulations per worker task
+
+# Read-only inputs for the simulation workers.
+# Set before the pool forks, so workers inherit them copy-on-write.
+cl_ctx = None
+alm_ctx = None
+cfg = None  # Parsed command-line arguments
+shard_seeds = None  # One independent SeedSequence per shard
 
 def generate_dummy_spectrum(lmax):
     """Generates a flat Cl spectrum for testing physics-agnostic statistics."""
@@ -15,7 +25,30 @@ def generate_dummy_spectrum(lmax):
     cl[0:2] = 0  # No monopole/dipole
     return cl
 
+def _run_shard(k):
+    """
+    S_gamma for simulations [k*SHARD_SIZE, (k+1)*SHARD_SIZE), run in a worker.
+    
+    Each shard draws from its own spawned stream, so the scores do not
+    depend on how many workers share the shards.
+    """
+    rng = np.random.default_rng(shard_seeds[k])
+    n = min(SHARD_SIZE, cfg.nsims - k * SHARD_SIZE)
+    
+    # A. Generate Null CMB (random phases): the whole shard in one draw
+    alm_cmb_all = synalm_batch(cl_ctx, cfg.lmax, n, rng)
+    
+    # B. Inject Signal (The "Cost" of Observation), broadcast over the shard
+    # a_obs = a_cmb + lambda * a_ctx
+    # Note: This simulates the shift in mean (mu_CE - mu_TE)
+    alm_obs_all = alm_cmb_all + (cfg.lambda_inj * alm_ctx)
+    
+    # C. Measure P1 Statistic (S_gamma)
+    # We check phase alignment between the *Observed* sky and the *Context*
+    return calc_phase_alignment_batch(alm_obs_all, alm_ctx, lmin=2, lmax=cfg.lmax).tolist()
+
 def main():
+    global cl_ctx, alm_ctx, cfg, shard_seeds
     parser = argparse.ArgumentParser(description="P1 Injection Test Suite")
     parser.add_argument("--nsims", type=int, default=100, help="Number of Monte Carlo realizations")
     parser.add_argument("--nside", type=int, default=64, help="Healpix resolution (keep low for speed)")
@@ -24,8 +57,11 @@ def main():
     parser.add_argument("--seed", type=int, default=42)
     parser.add_argument("--out", type=Path, default="artifacts/injection_results.json")
     args = parser.parse_args()
+    cfg = args
 
-    np.random.seed(args.seed)
+    # Independent, reproducible streams: one for the context, one per shard
+    n_shards = -(-args.nsims // SHARD_SIZE)
+    ctx_seed, *shard_seeds = np.random.SeedSequence(args.seed).spawn(1 + n_shards)
     
     # 1. Setup Context Template (T_ctx)
     # In a real run, load this from 'pbc.context.build_context_template'
@@ -33,26 +69,16 @@ def main():
     print(f"Generating synthetic context (Lmax={args.lmax})...")
     cl_ctx = generate_dummy_spectrum(args.lmax)
     # T_ctx is usually geometric, so let's make it static (fixed across sims)
-    alm_ctx = hp.synalm(cl_ctx, lmax=args.lmax, new=True)
+    alm_ctx = synalm_batch(cl_ctx, args.lmax, 1, np.random.default_rng(ctx_seed))[0]
 
     # 2. Simulation Loop
+    # Simulations are independent: shards of SHARD_SIZE run in parallel workers
     results = []
     print(f"Running {args.nsims} injections with lambda={args.lambda_inj}...")
     
-    for i in tqdm(range(args.nsims)):
-        # A. Generate Null CMB (random phases)
-        alm_cmb = hp.synalm(cl_ctx, lmax=args.lmax, new=True)
-        
-        # B. Inject Signal (The "Cost" of Observation)
-        # a_obs = a_cmb + lambda * a_ctx
-        # Note: This simulates the shift in mean (mu_CE - mu_TE)
-        alm_obs = alm_cmb + (args.lambda_inj * alm_ctx)
-        
-        # C. Measure P1 Statistic (S_gamma)
-        # We check phase alignment between the *Observed* sky and the *Context*
-        s_gamma = calc_phase_alignment(alm_obs, alm_ctx, lmin=2, lmax=args.lmax)
-        
-        results.append(s_gamma)
+    with multiprocessing.get_context("fork").Pool() as pool:
+        for scores in tqdm(pool.imap(_run_shard, range(n_shards)), total=n_shards):
+            results.extend(scores)
 
     # 3. Analysis
     results = np.array(results)
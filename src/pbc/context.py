@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import Optional, List, Tuple
 
 from pbc.utils.io import read_map
+from pbc.utils.sht import map2alm
 
 def build_mask(
     map_in: np.ndarray, 
@@ -32,22 +33,106 @@ def build_mask(
     mask_float = binary_mask.astype(float)
     
     # 2. Apodization
-    # Note: We use healpy's smoothing as a lightweight alternative 
-    # if NaMaster is not strictly required for this step, 
-    # but strictly this should align with the paper's window function.
-    if apod_arcmin > 0:
-        # Simple Gaussian smoothing approximation for apodization edges
-        # In a full pipeline, use nmt.mask_apodization here.
-        fwhm_rad = np.radians(apod_arcmin / 60.0)
-        mask_apod = hp.smoothing(mask_float, fwhm=fwhm_rad)
-        # Re-clip to ensure strictly [0,1]
-        mask_apod = np.clip(mask_apod, 0.0, 1.0)
-        # Hard zero out the original bad pixels
-        mask_apod *= mask_float 
+    # C2 taper in real space (as nmt.mask_apodization's "C2"): only pixels
+    # within apod_arcmin of a cut are touched, so no SHT pair is needed.
+    if apod_arcmin > 0 and not binary_mask.all():
+        apod_rad = np.radians(apod_arcmin / 60.0)
+        # x = 1 (taper value exactly 1) beyond apod_rad
+        x = np.minimum(distance_to_edge(binary_mask, apod_rad) / apod_rad, 1.0)
+        mask_apod = 0.5 * (1.0 - np.cos(np.pi * x))
+        # Hard zero out the original bad pixels (distance 0 already gives 0)
+        mask_apod *= mask_float
         return mask_apod
     
     return mask_float
 
+def _edge_pixels(binary_mask: np.ndarray, chunk: int = 1 << 20) -> np.ndarray:
+    """
+    Masked pixels of a RING mask with at least one valid neighbour.
+
+    Neighbours are looked up 'chunk' masked pixels at a time, so the
+    (8, chunk) neighbour table stays small however large the cut is.
+    """
+    nside = hp.npix2nside(binary_mask.size)
+    masked = np.flatnonzero(~binary_mask)
+    edge = []
+    for i in range(0, masked.size, chunk):
+        pix = masked[i:i + chunk]
+        nb = hp.get_all_neighbours(nside, pix)  # (8, n), -1 where missing
+        valid = binary_mask[nb] & (nb >= 0)
+        edge.append(pix[valid.any(axis=0)])
+    return np.concatenate(edge) if edge else masked
+
+def distance_to_edge(binary_mask: np.ndarray, max_rad: float, batch: int = 1024) -> np.ndarray:
+    """
+    Angular distance (radians) from each valid pixel of a RING mask to the
+    nearest masked pixel centre, below 'max_rad' (np.inf beyond it, 0 on
+    masked pixels).
+    
+    The nearest masked pixel of a valid one is always on the cut's edge,
+    so only edge pixels (masked, with a valid neighbour) are searched:
+    every valid pixel centre within max_rad of each is gathered with
+    hp.query_disc, 'batch' edge pixels at a time, and the exact
+    great-circle distance kept where smaller. The work scales with the
+    number of edge pixels times the pixels in a disc of radius max_rad.
+    """
+    nside = hp.npix2nside(binary_mask.size)
+    dist = np.full(binary_mask.size, np.inf)
+    dist[~binary_mask] = 0.0
+    edge = _edge_pixels(binary_mask)
+    edge_vec = np.array(hp.pix2vec(nside, edge)).T
+    
+    for i in range(0, edge.size, batch):
+        discs = [hp.query_disc(nside, v, max_rad) for v in edge_vec[i:i + batch]]
+        pix = np.concatenate(discs)
+        src = np.repeat(edge[i:i + batch], [d.size for d in discs])
+        keep = binary_mask[pix]
+        pix, src = pix[keep], src[keep]
+        
+        # Chord -> great-circle distance, accurate at small separations
+        chord = np.linalg.norm(
+            np.array(hp.pix2vec(nside, pix)) - np.array(hp.pix2vec(nside, src)), axis=0
+        )
+        d = 2.0 * np.arcsin(np.minimum(0.5 * chord, 1.0))
+        np.minimum.at(dist, pix, d)
+    
+    dist[dist >= max_rad] = np.inf
+    return dist
+
+def gal_to_ecl_interp(nside: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Interpolation pixels and weights, each (4, Npix), that rotate a RING
+    map from Galactic to Ecliptic coordinates.
+    
+    Same scheme as hp.Rotator(coord=['G', 'E']).rotate_map_pixel, but the
+    pixel-centre rotation and weight lookup are done once so every map
+    sharing the geometry is rotated by a plain gather (rotate_with_interp).
+    """
+    theta, phi = hp.pix2ang(nside, np.arange(hp.nside2npix(nside)))
+    theta_rot, phi_rot = hp.Rotator(coord=['G', 'E']).I(theta, phi)
+    return hp.get_interp_weights(nside, theta_rot, phi_rot)
+
+def rotate_with_interp(m: np.ndarray, interp: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """Applies precomputed (pixels, weights) from gal_to_ecl_interp to a map."""
+    p, w = interp
+    return np.sum(m[p] * w, axis=0)
+
+def project_out(X: np.ndarray, S: np.ndarray) -> np.ndarray:
+    """
+    Removes the component of each column of X in the span of S's columns.
+
+    Same result as subtracting S @ lstsq(S, X[:, i], rcond=None) per
+    column, but from one SVD of S. Only singular directions above lstsq's
+    default cutoff (max(S.shape) * eps * s_max) form the basis, so
+    degenerate templates (e.g. a duplicated systematic) project onto
+    col(S) alone rather than onto round-off directions.
+    """
+    U, s, _ = np.linalg.svd(S, full_matrices=False)
+    if s.size == 0 or s[0] == 0:
+        return X
+    U = U[:, s > max(S.shape) * np.finfo(s.dtype).eps * s[0]]
+    return X - U @ (U.conj().T @ X)
+
 def effective_f_sky(mask: np.ndarray) -> float:
     """Returns the effective sky fraction f_sky."""
     return np.mean(mask)
@@ -94,14 +179,16 @@ def build_context_template(
     # Coordinate Rotation: Galactic -> Ecliptic
     # The "bookkeeping" (scan strategy) is locked to Ecliptic coordinates.
     # We must rotate the maps to capture the geometry correctly.
-    r = hp.Rotator(coord=['G', 'E'])
-    exp_ecl = r.rotate_map_pixel(exp_map)
-    zodi_ecl = r.rotate_map_pixel(zodi_map)
+    # The pixel mapping is fixed for a given nside: build it once, reuse per map
+    interp = gal_to_ecl_interp(hp.npix2nside(exp_map.size))
+    exp_ecl = rotate_with_interp(exp_map, interp)
+    zodi_ecl = rotate_with_interp(zodi_map, interp)
     
     # Extract low-ell harmonics on the masked sky
     # We effectively treat the masked region as zeros for feature definition
-    alm_exp = hp.map2alm(exp_ecl * mask, lmax=lmax)
-    alm_zodi = hp.map2alm(zodi_ecl * mask, lmax=lmax)
+    # (ducc0 transforms share one cached geometry per nside)
+    alm_exp = map2alm(exp_ecl * mask, lmax=lmax)
+    alm_zodi = map2alm(zodi_ecl * mask, lmax=lmax)
     
     # Construct Design Matrix X (Rows = modes, Cols = features)
     # We stack the alm vectors as columns.
@@ -118,16 +205,13 @@ def build_context_template(
         for sys_path in systematics_paths:
             m_sys = read_map(sys_path, quick_nside=nside)
             # Systematics are usually in Galactic, so rotate them too
-            m_sys_ecl = r.rotate_map_pixel(m_sys)
-            sys_alms.append(hp.map2alm(m_sys_ecl * mask, lmax=lmax))
+            m_sys_ecl = rotate_with_interp(m_sys, interp)
+            sys_alms.append(map2alm(m_sys_ecl * mask, lmax=lmax))
         
         S = np.vstack(sys_alms).T
         
-        # Projection: X_clean = (I - S(S^T S)^-1 S^T) X
-        # Using least squares to subtract the systematics component
-        for i in range(X.shape[1]):
-            coeffs, _, _, _ = np.linalg.lstsq(S, X[:, i], rcond=None)
-            X[:, i] -= S @ coeffs
+        # Projection: X_clean = (I - S S^+) X, all columns at once
+        X = project_out(X, S)
 
     # --- Step 3 & 4: Normalization and Basis Selection  ---
     # "Take the leading mode c" via SVD
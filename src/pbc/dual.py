@@ -1,6 +1,42 @@
 import numpy as np
 
-def woodbury_update_covariance(sigma_te, c, lambda_gamma):
+def _context_projection(sigma_te, c, lambda_gamma):
+    """
+    The susceptibility vector v = Sigma_TE * c and the Woodbury factor
+    k = 1 + lambda * c.T * v, shared by the covariance and mean updates.
+    """
+    # If sigma_te is 1D (diagonal approx), use element-wise multiply
+    if sigma_te.ndim == 1:
+        v = sigma_te * c
+    else:
+        v = sigma_te @ c
+
+    # k = 1 + lambda * c.T * v
+    c_dot_v = np.dot(c, v)
+    k = 1.0 + lambda_gamma * c_dot_v
+    return v, k
+
+def _rank1_downdate(sigma_te, v, scale, out=None):
+    """
+    Sigma_TE - scale * (v outer v), or its diagonal for a diagonal sigma_te.
+    
+    Written into 'out' when given (same shape as the result), so repeated
+    updates (e.g. per-ell blocks) can reuse one buffer. The outer product
+    is formed in the result buffer itself: no second N x N array.
+    """
+    if sigma_te.ndim == 1:
+        # Diagonal approximation: only the diagonal of the update is needed
+        return np.subtract(sigma_te, scale * v * v, out=out)
+
+    if out is None:
+        out = np.empty(sigma_te.shape, dtype=np.result_type(sigma_te, v))
+    # v_i v_j == v_j v_i exactly, so a symmetric Sigma_TE stays symmetric
+    np.multiply.outer(v, v, out=out)
+    out *= -scale
+    out += sigma_te
+    return out
+
+def woodbury_update_covariance(sigma_te, c, lambda_gamma, out=None):
     """
     Computes the CE posterior covariance using the Woodbury rank-1 update.
     
@@ -12,31 +48,18 @@ def woodbury_update_covariance(sigma_te, c, lambda_gamma):
         sigma_te (np.ndarray): The TE posterior covariance matrix (or diagonal).
         c (np.ndarray): The context vector (alm coefficients).
         lambda_gamma (float): The context coupling strength.
-        
+        out (np.ndarray, optional): Preallocated result buffer, e.g. one
+            reused across per-ell blocks.
+    
     Returns:
-        np.ndarray: The CE covariance update (difference or full matrix).
+        np.ndarray: The CE covariance (full matrix, or its diagonal for a
+        diagonal sigma_te).
     """
-    # 1. Compute projection v = Sigma_TE * c
-    # If sigma_te is 1D (diagonal approx), use element-wise multiply
-    if sigma_te.ndim == 1:
-        v = sigma_te * c
-    else:
-        v = sigma_te @ c
-        
-    # 2. Compute scalar denominator factor k
-    # k = 1 + lambda * c.T * v
-    c_dot_v = np.dot(c, v)
-    k = 1.0 + lambda_gamma * c_dot_v
-    
-    # 3. Compute the update term
+    v, k = _context_projection(sigma_te, c, lambda_gamma)
+
     # term = lambda/k * (v outer v)
     # This represents the "information loss" along the context direction.
-    scale = lambda_gamma / k
-    update = scale * np.outer(v, v)
-    
-    # In practice, we often return just the update or the diagonal of the new matrix
-    # depending on memory constraints. Here we return the full rank-1 update matrix.
-    return sigma_te - update
+    return _rank1_downdate(sigma_te, v, lambda_gamma / k, out)
 
 def calculate_mean_shift(mu_te, sigma_te, c, lambda_gamma, d_obs=None):
     """
@@ -47,28 +70,115 @@ def calculate_mean_shift(mu_te, sigma_te, c, lambda_gamma, d_obs=None):
     
     Args:
         mu_te (np.ndarray): The TE posterior mean (Wiener filter).
-        sigma_te (np.ndarray): The TE posterior covariance.
+        sigma_te (np.ndarray): The TE posterior covariance (or diagonal).
         c (np.ndarray): The context vector.
         lambda_gamma (float): Coupling strength.
         
     Returns:
         np.ndarray: The vector shift Delta_mu.
     """
-    # 1. Compute projection v = Sigma_TE * c
-    if sigma_te.ndim == 1:
-        v = sigma_te * c
-    else:
-        v = sigma_te @ c
-        
-    # 2. Compute denominator k
-    k = 1.0 + lambda_gamma * np.dot(c, v)
-    
-    # 3. Compute scalar overlap (mu_TE . c)
+    v, k = _context_projection(sigma_te, c, lambda_gamma)
+
+    # Scalar overlap (mu_TE . c)
     # This measures how much the standard reconstruction looks like the context.
     overlap = np.dot(mu_te, c)
-    
-    # 4. Compute Shift
+
     # The shift is proportional to the overlap, directed along the "susceptibility" vector v.
     delta_mu = (lambda_gamma * overlap / k) * v
     
     return delta_mu
+
+def mean_shift_projection(mu_te, sigma_te, c, lambda_gamma):
+    """
+    The scalars of the mean shift, without building Delta_mu itself.
+    
+    Delta_mu = scale * Sigma_TE * c (see calculate_mean_shift), for callers
+    that only need its amplitude or apply Sigma_TE * c themselves. For a
+    diagonal Sigma_TE, c.T * Sigma_TE * c = sum(sigma_i * c_i^2) is one
+    fused reduction and no vector is built at all.
+    
+    Args:
+        mu_te (np.ndarray): The TE posterior mean (Wiener filter).
+        sigma_te (np.ndarray): The TE posterior covariance (or diagonal).
+        c (np.ndarray): The context vector.
+        lambda_gamma (float): Coupling strength.
+    
+    Returns:
+        tuple: (scale, overlap, k), with overlap = mu_TE . c and
+        k = 1 + lambda * c.T * Sigma_TE * c.
+    """
+    if sigma_te.ndim == 1:
+        k = 1.0 + lambda_gamma * np.einsum('i,i,i->', sigma_te, c, c)
+    else:
+        _, k = _context_projection(sigma_te, c, lambda_gamma)
+    overlap = np.dot(mu_te, c)
+    return lambda_gamma * overlap / k, overlap, k
+
+def ce_posterior_update(mu_te, sigma_te, c, lambda_gamma):
+    """
+    The paired CE posterior update: mean shift and covariance together.
+    
+    Same results as calculate_mean_shift and woodbury_update_covariance,
+    but v = Sigma_TE * c (the only O(N^2) product) and k are computed once.
+    
+    Args:
+        mu_te (np.ndarray): The TE posterior mean (Wiener filter).
+        sigma_te (np.ndarray): The TE posterior covariance matrix (or diagonal).
+        c (np.ndarray): The context vector.
+        lambda_gamma (float): Coupling strength.
+    
+    Returns:
+        tuple: (Delta_mu, Sigma_CE).
+    """
+    v, k = _context_projection(sigma_te, c, lambda_gamma)
+    overlap = np.dot(mu_te, c)
+    delta_mu = (lambda_gamma * overlap / k) * v
+    return delta_mu, _rank1_downdate(sigma_te, v, lambda_gamma / k)
+
+class WoodburyCovariance:
+    """
+    The CE posterior covariance kept in factored form, Sigma_TE and the
+    rank-1 term (v, lambda / k), without building the N x N matrix.
+
+    Products, the diagonal and solves are applied implicitly:
+        Sigma_CE x      = Sigma_TE x - (lambda / k) v (v . x)
+        Sigma_CE^-1 x   = Sigma_TE^-1 x + lambda c (c . x)
+    so callers needing only these never touch O(N^2) memory beyond
+    Sigma_TE itself (none at all for a diagonal sigma_te).
+
+    Args:
+        sigma_te (np.ndarray): The TE posterior covariance matrix (or diagonal).
+        c (np.ndarray): The context vector (alm coefficients).
+        lambda_gamma (float): The context coupling strength.
+    """
+    def __init__(self, sigma_te, c, lambda_gamma):
+        self.sigma_te = sigma_te
+        self.c = c
+        self.lambda_gamma = lambda_gamma
+        self.v, self.k = _context_projection(sigma_te, c, lambda_gamma)
+        self.scale = lambda_gamma / self.k
+
+    def matvec(self, x):
+        """Sigma_CE @ x."""
+        if self.sigma_te.ndim == 1:
+            sx = self.sigma_te * x
+        else:
+            sx = self.sigma_te @ x
+        return sx - (self.scale * np.dot(self.v, x)) * self.v
+
+    def diag(self):
+        """The diagonal of Sigma_CE (its marginal variances)."""
+        sigma_diag = self.sigma_te if self.sigma_te.ndim == 1 else np.diagonal(self.sigma_te)
+        return sigma_diag - self.scale * self.v * self.v
+
+    def solve(self, b):
+        """Sigma_CE^-1 @ b, from a solve against Sigma_TE alone."""
+        if self.sigma_te.ndim == 1:
+            x = b / self.sigma_te
+        else:
+            x = np.linalg.solve(self.sigma_te, b)
+        return x + (self.lambda_gamma * np.dot(self.c, b)) * self.c
+
+    def todense(self, out=None):
+        """The full Sigma_CE, as woodbury_update_covariance returns it."""
+        return _rank1_downdate(self.sigma_te, self.v, self.scale, out)
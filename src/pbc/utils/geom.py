@@ -0,0 +1,68 @@
+import numpy as np
+import healpy as hp
+from functools import lru_cache
+from pathlib import Path
+
+from pbc.utils.io import save_npy
+
+def get_lat(nside: int, cache_dir: Path = Path("data/processed")) -> np.ndarray:
+    """
+    Latitude in the map's frame (degrees, float32) of every RING pixel:
+    90 - colatitude, whatever frame the map is in (Galactic b for Planck
+    maps, ecliptic or equatorial latitude for maps in those frames).
+
+    Latitude is constant along each RING ring, so it is evaluated once per
+    ring (4*nside - 1 values) and repeated; no per-pixel trig, no phi.
+    Cached on disk per nside (the values are frame-independent).
+    """
+    cache = cache_dir / f"ring_lat_n{nside}.npy"
+    if cache.exists():
+        return np.load(cache)
+
+    _, nring, costheta = hp.ringinfo(nside, np.arange(1, 4 * nside))[:3]
+    lat = np.repeat(np.degrees(np.arcsin(costheta)).astype(np.float32), nring)
+    save_npy(lat, cache)
+    return lat
+
+def galactic_mask(nside: int, b_cut: float, cache_dir: Path = Path("data/processed")) -> np.ndarray:
+    """
+    Boolean RING mask keeping |latitude| > b_cut (degrees), latitude in
+    the map's frame (see get_lat): a Galactic-plane cut for Galactic maps.
+
+    Cached on disk as a packed bitmap (1 bit per pixel).
+    """
+    npix = hp.nside2npix(nside)
+    cache = cache_dir / f"mask_lat_b{b_cut:g}_n{nside}.npy"
+    if cache.exists():
+        return np.unpackbits(np.load(cache), count=npix).astype(bool)
+
+    mask = np.abs(get_lat(nside, cache_dir)) > b_cut
+    save_npy(np.packbits(mask), cache)
+    return mask
+
+@lru_cache(maxsize=4)
+def ring_layout(nside: int):
+    """
+    Per-pixel RING structure: (ring start pixel, ring length, index in ring).
+
+    Cached per nside; treat the returned arrays as read-only.
+    """
+    rings = np.arange(1, 4 * nside)
+    start, nring = hp.ringinfo(nside, rings)[:2]
+    start = np.repeat(start, nring)
+    length = np.repeat(nring, nring)
+    pos = np.arange(hp.nside2npix(nside)) - start
+    return start, length, pos
+
+def rotate_longitude(m: np.ndarray, angle_deg: float) -> np.ndarray:
+    """
+    Rotates a RING map about the Z-axis by permuting pixels within rings.
+
+    Same direction as hp.Rotator(rot=[angle_deg, 0, 0]).rotate_map_pixel:
+    a feature at longitude phi moves to phi - angle_deg. Each iso-latitude
+    ring is rolled by round(angle/360 * ring length) pixels: a single
+    gather, no interpolation. Latitude-only masks are preserved exactly.
+    """
+    start, length, pos = ring_layout(hp.npix2nside(m.size))
+    shift = np.rint(length * (angle_deg / 360.0)).astype(length.dtype)
+    return m[start + (pos + shift) % length]
@@ -0,0 +1,127 @@
+import numpy as np
+
+def _uniform_bin_index(v: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Bin of each value on uniform 'edges' (values inside the edges), as
+    np.searchsorted(edges, v, side='right') - 1 with the top edge inclusive.
+
+    The index comes from rescaling in float64, then one decrement/increment
+    against the true edges, as np.histogram does for uniform bins.
+    """
+    bins = edges.size - 1
+    e0, e1 = edges[0], edges[-1]
+    idx = ((v - e0) * (bins / (e1 - e0))).astype(np.intp)
+    np.clip(idx, 0, bins - 1, out=idx)
+    idx -= v < edges[idx]
+    idx += (v >= edges[idx + 1]) & (idx != bins - 1)
+    return idx
+
+def hist2d_uniform(x: np.ndarray, y: np.ndarray, bins: int, range=None,
+                   half_open: bool = False) -> np.ndarray:
+    """
+    Counts on a uniform bins x bins grid, identical to np.histogram2d.
+
+    The edges are numpy's own (np.linspace over the range, in the input
+    precision), but bin indices come from rescaling plus an edge fix-up,
+    not a searchsorted over the edges, and a single bincount accumulates
+    them. Upper edges are inclusive for the last bin, as in numpy, unless
+    'half_open': then every bin is [lo, hi) and points on the top edge of
+    either axis are not counted. 'range' defaults to the data's bounding
+    box.
+    """
+    if range is None:
+        (x0, x1), (y0, y1) = (x.min(), x.max()), (y.min(), y.max())
+    else:
+        (x0, x1), (y0, y1) = range
+
+    # Degenerate extent: widen by 0.5 on each side, like numpy
+    if x1 == x0: x0, x1 = x0 - 0.5, x1 + 0.5
+    if y1 == y0: y0, y1 = y0 - 0.5, y1 + 0.5
+
+    # Compare in float64: exact for the float32 edges/values numpy compares
+    ex = np.linspace(x0, x1, bins + 1).astype(np.float64)
+    ey = np.linspace(y0, y1, bins + 1).astype(np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    inside = None
+    if range is not None:
+        inside = (x >= ex[0]) & (x <= ex[-1]) & (y >= ey[0]) & (y <= ey[-1])
+    if half_open:
+        below_top = (x < ex[-1]) & (y < ey[-1])
+        inside = below_top if inside is None else inside & below_top
+    if inside is not None:
+        x, y = x[inside], y[inside]
+
+    ix = _uniform_bin_index(x, ex)
+    ix *= bins
+    ix += _uniform_bin_index(y, ey)
+    return np.bincount(ix, minlength=bins * bins).reshape(bins, bins)
+
+def hexbin_counts(x: np.ndarray, y: np.ndarray, gridsize: int) -> np.ndarray:
+    """
+    Counts per hexagon, as matplotlib's Axes.hexbin(x, y, gridsize, mincnt=0)
+    reports them, without building a Figure.
+
+    Same geometry as matplotlib: two offset rectangular lattices spanning
+    the data's bounding box ((nx+1)(ny+1) centres, then nx*ny), each point
+    going to the nearer centre. Empty hexagons are included.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    nx = gridsize
+    ny = int(nx / np.sqrt(3))
+    nx1, ny1 = nx + 1, ny + 1
+
+    x0, x1 = x.min(), x.max()
+    y0, y1 = y.min(), y.max()
+    # Hexagons exactly cover the x extent; pad against roundoff
+    padding = 1.e-9 * (x1 - x0)
+    x0, x1 = x0 - padding, x1 + padding
+    sx = (x1 - x0) / nx
+    sy = (y1 - y0) / ny
+
+    # Positions in hexagon index coordinates, then the candidate centre on
+    # each lattice (lattice 2 is offset by half a cell in both axes)
+    ix = (x - x0) / sx
+    iy = (y - y0) / sy
+    ix1 = np.round(ix).astype(np.intp)
+    iy1 = np.round(iy).astype(np.intp)
+    ix2 = np.floor(ix).astype(np.intp)
+    iy2 = np.floor(iy).astype(np.intp)
+    on1 = ((ix - ix1) ** 2 + 3.0 * (iy - iy1) ** 2
+           < (ix - ix2 - 0.5) ** 2 + 3.0 * (iy - iy2 - 0.5) ** 2)
+
+    # One packed index over both lattices (lattice 2 after lattice 1) and a
+    # single bincount. The grid spans the data's own extent, so the chosen
+    # centre is always on the grid: x is padded, and a point on the top
+    # edge (iy == ny) is always nearer its lattice-1 centre.
+    ix1 *= ny1
+    ix1 += iy1
+    ix2 *= ny
+    ix2 += iy2
+    ix2 += nx1 * ny1
+    return np.bincount(np.where(on1, ix1, ix2), minlength=nx1 * ny1 + nx * ny)
+
+def rotate_points(x: np.ndarray, y: np.ndarray, theta_deg, out=None):
+    """
+    Rotates centred coordinates (x, y) about the origin by theta_deg.
+
+    An array of angles gives (A, N) results, one row per angle. 'out' is an
+    optional (out_x, out_y) pair of the result shape, so a sweep can reuse
+    its buffers instead of allocating new arrays for every angle.
+    """
+    theta = np.radians(theta_deg)
+    c, s = np.cos(theta), np.sin(theta)
+    if np.ndim(theta):
+        c, s = c[:, None], s[:, None]
+    if out is None:
+        shape = np.broadcast_shapes(np.shape(c), np.shape(x))
+        dtype = np.result_type(x, y, c)
+        out = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype))
+
+    out_x, out_y = out
+    np.multiply(x, c, out=out_x)
+    out_x -= y * s
+    np.multiply(x, s, out=out_y)
+    out_y += y * c
+    return out_x, out_y
@@ -21,19 +21,44 @@ def create_bins(nside: int, nlb: int = 50, lmin: int | None = None, lmax: int |
         lmin_val = 0 if lmin is None else int(lmin)
         lmax_val = 3 * nside - 1 if lmax is None else int(lmax)
         
-        ell_min = np.arange(lmin_val, lmax_val + 1, nlb, dtype=int)
-        ell_max = np.minimum(ell_min + nlb - 1, lmax_val)
+        # Bin edges computed directly, in int32 (halves the edge arrays)
+        n_bins = (lmax_val - lmin_val + nlb) // nlb
+        ell_min = lmin_val + nlb * np.arange(n_bins, dtype=np.int32)
+        ell_max = np.minimum(ell_min + (nlb - 1), lmax_val)
         return nmt.NmtBin.from_edges(ell_min, ell_max)
 
 def create_field(m: np.ndarray, mask: np.ndarray, lmax: int | None = None) -> nmt.NmtField:
     """Creates a NaMaster scalar field."""
-    # Ensure mask is applied
-    m_masked = m * mask
-    return nmt.NmtField(mask, [m_masked], lmax=lmax)
+    # NmtField applies the mask itself (masked_on_input=False): no masked copy
+    return nmt.NmtField(mask, [m], masked_on_input=False, lmax=lmax)
 
-def compute_bandpowers(f1: nmt.NmtField, f2: nmt.NmtField, b: nmt.NmtBin) -> np.ndarray:
-    """Compute workspace-based bandpowers."""
+def compute_workspace(f1: nmt.NmtField, f2: nmt.NmtField, b: nmt.NmtBin) -> nmt.NmtWorkspace:
+    """
+    Mode-coupling matrix of (f1, f2, b), an O(lmax^3) computation.
+
+    It depends on the fields' masks, beams and settings and on the
+    binning, not on the maps: compute it once per setup and pass it to
+    compute_bandpowers as 'workspace' for every map sharing that setup.
+    """
     w = nmt.NmtWorkspace()
     w.compute_coupling_matrix(f1, f2, b)
+    return w
+
+def compute_bandpowers(
+    f1: nmt.NmtField,
+    f2: nmt.NmtField,
+    b: nmt.NmtBin,
+    workspace: nmt.NmtWorkspace | None = None
+) -> np.ndarray:
+    """
+    Compute workspace-based bandpowers.
+
+    'workspace' (from compute_workspace) must have been built for the same
+    masks, field settings and binning as f1, f2 and b; Monte Carlo loops
+    then only pay for decoupling. Without it the coupling matrix is
+    computed for this call.
+    """
+    if workspace is None:
+        workspace = compute_workspace(f1, f2, b)
     cl_coupled = nmt.compute_coupled_cell(f1, f2)
-    return w.decouple_cell(cl_coupled)
+    return workspace.decouple_cell(cl_coupled)
@@ -1,6 +1,11 @@
+import gzip
 import json
+import math
+import shutil
+import sys
 import numpy as np
 import healpy as hp
+from astropy.io import fits
 from pathlib import Path
 from dataclasses import dataclass
 
@@ -11,36 +16,127 @@ class MapBundle:
     mask: np.ndarray
     nside: int
 
-def read_map(path: str | Path, quick_nside: int | None = None) -> np.ndarray:
-    """Reads a FITS map and optionally downgrades it."""
+def _memmap_columns(p: Path, fields: tuple[int, ...]):
+    """
+    Memory-mapped HEALPix columns of a full-sky FITS map, without reading
+    the file up front: (list of 1-D big-endian views, is_nested), or None
+    for a partial-sky (explicit index) map.
+    """
+    with fits.open(p.as_posix(), memmap=True) as hdul:
+        hdu = hdul[1]
+        if hdu.header.get("INDXSCHM", "IMPLICIT").strip().upper() != "IMPLICIT":
+            return None
+        nest = hdu.header.get("ORDERING", "RING").strip().upper().startswith("NEST")
+        # Columns are (nrows, pixels per row): flatten to the pixel vector
+        cols = [hdu.data.field(i).reshape(-1) for i in fields]
+    return cols, nest
+
+def read_map(
+    path: str | Path,
+    quick_nside: int | None = None,
+    field: int | tuple[int, ...] = 0
+) -> np.ndarray:
+    """
+    Reads a FITS map and optionally downgrades it.
+
+    A tuple 'field' (e.g. (1, 2, 3) for Q, U, hits) is read in one pass
+    over the HDU and downgraded as a single (n_fields, npix) stack.
+
+    The HDU is memory-mapped, so the file is not read up front. Downgraded
+    maps are averaged in float32 (quick_nside is for quick-look
+    resolutions). Otherwise the columns are materialized once, in RING order
+    and native byte order, as hp.read_map returns them.
+    """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"Map not found: {p}")
-        
-    m = hp.read_map(p.as_posix(), verbose=False)
-    
-    # Handle multi-dimensional maps (e.g. TQU), take T if it's the first dim
-    if m.ndim != 1:
-        arr = np.asarray(m)
-        if arr.ndim == 2 and arr.shape[0] >= 1:
-            m = arr[0]
-        else:
-            raise ValueError(f"Unexpected FITS shape for {path}: {arr.shape}")
-            
-    # Downgrade if requested
-    if quick_nside is not None and hp.get_nside(m) != quick_nside:
+
+    fields = field if isinstance(field, tuple) else (field,)
+    mapped = _memmap_columns(p, fields)
+    if mapped is None:
+        # Partial-sky maps: let healpy scatter the explicit pixels
+        m = np.asarray(hp.read_map(p.as_posix(), field=field))
+        nest = False
+    else:
+        cols, nest = mapped
+        m = cols[0] if len(cols) == 1 and not isinstance(field, tuple) else np.stack(cols)
+
+    # Downgrade if requested. NEST input is downgraded as it is stored:
+    # ud_grade averages in NEST order anyway, and returns RING
+    # npix = 12 nside^2 (ud_grade validates the size itself)
+    if quick_nside is not None and math.isqrt(m.shape[-1] // 12) != quick_nside:
+        # The low-resolution map is a quick-look product: average in single
+        # precision, halving the traffic of the full-resolution passes
+        m = m.astype(np.float32, copy=False)
         # Power = -2 for temperature-like scalar field
-        m = hp.ud_grade(m, nside_out=quick_nside, power=-2)
-        
-    return m
+        return hp.ud_grade(m, nside_out=quick_nside, power=-2,
+                           order_in="NESTED" if nest else "RING", order_out="RING")
+
+    if nest:
+        m = hp.reorder(m, n2r=True)
+    # FITS data is big-endian: the byte swap also detaches it from the file
+    return np.asarray(m, dtype=m.dtype.newbyteorder("="))
+
+def load_target_noise(hits_path: str | Path, nside: int, cache_dir: Path = Path("data/processed")) -> np.ndarray:
+    """
+    Returns the noise proxy 1/(hits+1) at 'nside', cached as float32 .npy.
+
+    Skips the FITS parse and ud_grade of the hits map on repeat runs.
+    """
+    hits_path = Path(hits_path)
+    cache = cache_dir / f"{hits_path.stem}_noise_n{nside}.npy"
+    if cache.exists():
+        return np.load(cache)
+
+    hits = hp.read_map(hits_path.as_posix(), verbose=False)
+    if hp.npix2nside(len(hits)) != nside:
+        hits = hp.ud_grade(hits, nside)
+    target_noise = (1.0 / (hits + 1.0)).astype(np.float32)
+    save_npy(target_noise, cache)
+    return target_noise
+
+def uncompressed_catalog(path: str | Path) -> Path:
+    """
+    Returns an uncompressed copy of a .fits.gz catalog, decompressing once.
+
+    fitsio can only seek to columns/rows in an uncompressed file; on a .gz
+    it inflates the whole HDU into memory on every open. The copy is
+    written next to the original (same name without .gz), only when that
+    file does not exist: an existing .fits is used as is, never
+    overwritten (delete it to refresh the copy). It is written to a .part
+    file first, so an interrupted run leaves no truncated catalog.
+    """
+    p = Path(path)
+    if p.suffix != ".gz":
+        return p
+    out = p.with_suffix("")
+    if not out.exists():
+        tmp = out.with_name(out.name + ".part")
+        with gzip.open(p, "rb") as src, open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, length=1 << 24)
+        tmp.replace(out)
+    return out
 
 def save_json(obj, path: Path) -> None:
+    """
+    Writes obj as indented, key-sorted JSON, streamed to the file.
+
+    json.dump encodes chunk by chunk, so the full document is never held
+    as one string. It is written to a .part file first, and renamed only
+    once complete.
+    """
+    path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(obj, indent=2, sort_keys=True))
+    tmp = path.with_name(path.name + ".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, sort_keys=True)
+    tmp.replace(path)
 
 def save_npy(arr: np.ndarray, path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     np.save(path.as_posix(), arr)
 
 def summary_line(msg: str) -> None:
-    print(json.dumps({"msg": msg}))
+    # Same line as print(json.dumps({"msg": msg})): only the string needs
+    # encoding, and the line goes out in one write
+    sys.stdout.write(f'{{"msg": {json.dumps(msg)}}}\n')
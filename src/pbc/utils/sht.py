@@ -0,0 +1,81 @@
+import os
+from functools import lru_cache
+import numpy as np
+import healpy as hp
+
+try:
+    import ducc0
+except ImportError:  # Optional: falls back to healpy's single-threaded libsharp
+    ducc0 = None
+
+NTHREADS = os.cpu_count() or 1
+
+@lru_cache(maxsize=None)
+def hp_geom(nside: int) -> dict:
+    """
+    ducc0 sht_info() geometry for a RING map, built once per nside so
+    repeated transforms skip the Healpix_Base/ring-table setup.
+    """
+    return ducc0.healpix.Healpix_Base(nside, "RING").sht_info()
+
+def alm2map(alm: np.ndarray, nside: int, nthreads: int = NTHREADS) -> np.ndarray:
+    """
+    Synthesizes a RING-ordered scalar map from healpy-ordered alms.
+
+    complex64 alms yield a float32 map (single-precision transform).
+    """
+    if ducc0 is None:
+        return hp.alm2map(alm, nside)
+
+    lmax = hp.Alm.getlmax(alm.size)
+    geom = hp_geom(nside)
+    if alm.dtype != np.complex64:
+        alm = np.asarray(alm, dtype=np.complex128)
+    m = ducc0.sht.synthesis(
+        alm=alm.reshape(1, -1),
+        lmax=lmax, spin=0, nthreads=nthreads, **geom
+    )
+    return m.reshape(-1)
+
+def map2alm(m: np.ndarray, lmax: int, niter: int = 3, nthreads: int = NTHREADS) -> np.ndarray:
+    """
+    Scalar map -> healpy-ordered alms.
+
+    Mirrors hp.map2alm: a pixel-area weighted adjoint synthesis followed
+    by 'niter' Jacobi refinement steps (healpy's default is iter=3).
+    """
+    if ducc0 is None:
+        return hp.map2alm(m, lmax=lmax, iter=niter)
+
+    nside = hp.npix2nside(m.size)
+    geom = hp_geom(nside)
+    m = np.asarray(m, dtype=np.float64).reshape(1, -1)
+    weight = 4 * np.pi / m.size
+
+    def adjoint(x):
+        return ducc0.sht.adjoint_synthesis(
+            map=x, lmax=lmax, spin=0, nthreads=nthreads, **geom
+        ) * weight
+
+    alm = adjoint(m)
+    for _ in range(niter):
+        resid = m - ducc0.sht.synthesis(alm=alm, lmax=lmax, spin=0, nthreads=nthreads, **geom)
+        alm += adjoint(resid)
+    return alm.reshape(-1)
+
+def synalm_batch(cl: np.ndarray, lmax: int, nsims: int, rng=np.random) -> np.ndarray:
+    """
+    'nsims' realizations of healpy-ordered alms for one spectrum, (nsims, Nalm).
+
+    Same construction as hp.synalm: a_lm = sqrt(C_l/2) (g1 + i g2), with the
+    m = 0 modes real and scaled by sqrt(C_l); but the Gaussians for every
+    realization come from one draw per part instead of a call per map.
+    """
+    cl = np.asarray(cl, dtype=np.float64)
+    ell = hp.Alm.getlm(lmax)[0]
+    re = rng.standard_normal((nsims, ell.size))
+    im = rng.standard_normal((nsims, ell.size))
+    alm = (re + 1j * im) * np.sqrt(cl[ell] / 2)
+    # healpy ordering is m-major: the first lmax+1 entries are m = 0
+    alm[:, :lmax + 1] = re[:, :lmax + 1] * np.sqrt(cl[:lmax + 1])
+    return alm
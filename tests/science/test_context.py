@@ -0,0 +1,118 @@
+import numpy as np
+import healpy as hp
+import pytest
+from pbc.context import (build_mask, distance_to_edge, gal_to_ecl_interp, project_out,
+                         rotate_with_interp)
+
+def _lstsq_residual(X, S):
+    """The reference projection: one least-squares fit per column."""
+    X = X.copy()
+    for i in range(X.shape[1]):
+        coeffs, _, _, _ = np.linalg.lstsq(S, X[:, i], rcond=None)
+        X[:, i] -= S @ coeffs
+    return X
+
+def _complex(rng, *shape):
+    return rng.standard_normal(shape) + 1j * rng.standard_normal(shape)
+
+@pytest.mark.parametrize("degenerate", [False, True])
+def test_project_out_matches_lstsq(degenerate):
+    """
+    Systematics removal must equal the per-column lstsq residual, also when
+    the templates are linearly dependent (S = [s, s, 2s]).
+    """
+    rng = np.random.default_rng(3)
+    X = _complex(rng, 200, 2)
+    if degenerate:
+        s = _complex(rng, 200)
+        S = np.stack([s, s, 2 * s], axis=1)
+    else:
+        S = _complex(rng, 200, 3)
+
+    np.testing.assert_allclose(project_out(X, S), _lstsq_residual(X, S), atol=1e-10)
+
+def test_project_out_removes_templates():
+    rng = np.random.default_rng(4)
+    S = _complex(rng, 100, 2)
+    X = S @ _complex(rng, 2, 2)
+    np.testing.assert_allclose(project_out(X, S), 0, atol=1e-10)
+
+def _brute_distance(mask, max_rad):
+    """Distance of every valid pixel to its nearest masked pixel, by brute force."""
+    nside = hp.npix2nside(mask.size)
+    vec = np.array(hp.pix2vec(nside, np.arange(mask.size)))
+    cut = vec[:, ~mask]
+    dist = np.zeros(mask.size)
+    valid = np.flatnonzero(mask)
+    for i in range(0, valid.size, 4096):
+        p = valid[i:i + 4096]
+        # Nearest by largest dot product, then the chord to it
+        near = cut[:, np.argmax(vec[:, p].T @ cut, axis=1)]
+        chord = np.linalg.norm(near - vec[:, p], axis=0)
+        dist[p] = 2.0 * np.arcsin(np.minimum(0.5 * chord, 1.0))
+    dist[dist >= max_rad] = np.inf
+    return dist
+
+def _disc_mask(nside, seed):
+    rng = np.random.default_rng(seed)
+    mask = np.ones(hp.nside2npix(nside), dtype=bool)
+    for _ in range(4):
+        v = rng.standard_normal(3)
+        mask[hp.query_disc(nside, v / np.linalg.norm(v), np.radians(rng.uniform(2, 20)))] = False
+    # Isolated cut pixels too (point sources)
+    mask[rng.integers(0, mask.size, 20)] = False
+    return mask
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_distance_to_edge_matches_brute_force(seed):
+    mask = _disc_mask(32, seed)
+    max_rad = np.radians(10)
+    np.testing.assert_allclose(distance_to_edge(mask, max_rad), _brute_distance(mask, max_rad),
+                               rtol=0, atol=1e-12)
+
+def test_distance_to_edge_band():
+    nside = 64
+    theta = hp.pix2ang(nside, np.arange(hp.nside2npix(nside)))[0]
+    mask = np.abs(np.pi / 2 - theta) > np.radians(8)
+    max_rad = np.radians(5)
+    np.testing.assert_allclose(distance_to_edge(mask, max_rad), _brute_distance(mask, max_rad),
+                               rtol=0, atol=1e-12)
+    # No cut: nothing is within reach
+    assert np.isinf(distance_to_edge(np.ones_like(mask), max_rad)).all()
+
+def test_build_mask_c2_taper():
+    nside, apod_arcmin = 32, 600.0
+    mask = _disc_mask(nside, 3)
+    map_in = np.where(mask, 0.0, 1e6)
+    got = build_mask(map_in, threshold_sigma=3.0, apod_arcmin=apod_arcmin)
+
+    apod_rad = np.radians(apod_arcmin / 60.0)
+    dist = _brute_distance(mask, apod_rad)
+    x = np.minimum(dist / apod_rad, 1.0)
+    np.testing.assert_allclose(got, 0.5 * (1.0 - np.cos(np.pi * x)), rtol=0, atol=1e-12)
+
+    # 0 on the cut, 1 beyond the apodization scale, monotone in between
+    assert (got[~mask] == 0).all()
+    assert (got[np.isinf(dist)] == 1).all()
+    order = np.argsort(distance_to_edge(mask, apod_rad))
+    assert (np.diff(got[order]) >= 0).all()
+    assert (got > 0).sum() == mask.sum()
+
+def test_build_mask_without_apodization():
+    map_in = np.zeros(hp.nside2npix(8))
+    map_in[:5] = 1e6
+    got = build_mask(map_in, threshold_sigma=3.0, apod_arcmin=0)
+    np.testing.assert_array_equal(got, np.r_[np.zeros(5), np.ones(map_in.size - 5)])
+
+@pytest.mark.parametrize("nside", [8, 16])
+def test_gal_to_ecl_matches_rotator(nside):
+    """The precomputed rotation equals hp.Rotator's pixel-space rotation."""
+    lmax = 2 * nside
+    np.random.seed(5)
+    m = hp.alm2map(hp.synalm(1.0 / (np.arange(lmax + 1) + 1.0) ** 3, lmax), nside)
+    interp = gal_to_ecl_interp(nside)
+    expected = hp.Rotator(coord=["G", "E"]).rotate_map_pixel(m)
+    np.testing.assert_allclose(rotate_with_interp(m, interp), expected, rtol=0, atol=1e-12)
+    # The same tables serve every map of the nside
+    np.testing.assert_allclose(rotate_with_interp(2 * m + 1, interp), 2 * expected + 1,
+                               rtol=0, atol=1e-12)
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from pbc.dual import (
+    WoodburyCovariance,
+    calculate_mean_shift,
+    ce_posterior_update,
+    mean_shift_projection,
+    woodbury_update_covariance,
+)
+
+LAMBDA = 0.7
+
+def _problem(n, complex_c=False, seed=0):
+    rng = np.random.default_rng(seed)
+    a = rng.standard_normal((n, n))
+    sigma = a @ a.T / n + np.eye(n)
+    c = rng.standard_normal(n)
+    mu = rng.standard_normal(n)
+    if complex_c:
+        c = c + 1j * rng.standard_normal(n)
+    return sigma, c, mu
+
+def _sherman_morrison(mu, sigma, c, lam):
+    """Baseline: the dense rank-1 formulas, written out directly."""
+    v = sigma @ c
+    k = 1.0 + lam * (c @ v)
+    return (lam * (mu @ c) / k) * v, sigma - (lam / k) * np.outer(v, v)
+
+@pytest.mark.parametrize("n", [5, 300])
+@pytest.mark.parametrize("complex_c", [False, True])
+def test_ce_posterior_update_matches_sherman_morrison(n, complex_c):
+    sigma, c, mu = _problem(n, complex_c)
+    dmu_ref, sigma_ref = _sherman_morrison(mu, sigma, c, LAMBDA)
+
+    dmu, sigma_ce = ce_posterior_update(mu, sigma, c, LAMBDA)
+    np.testing.assert_allclose(dmu, dmu_ref, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(sigma_ce, sigma_ref, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(woodbury_update_covariance(sigma, c, LAMBDA), sigma_ref,
+                               rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(calculate_mean_shift(mu, sigma, c, LAMBDA), dmu_ref,
+                               rtol=1e-12, atol=1e-12)
+    if not complex_c:
+        np.testing.assert_array_equal(sigma_ce, sigma_ce.T)
+
+@pytest.mark.parametrize("n", [5, 300])
+@pytest.mark.parametrize("order", ["C", "F"])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_woodbury_update_into_buffer(n, order, dtype):
+    sigma, c, mu = _problem(n)
+    _, sigma_ref = _sherman_morrison(mu, sigma, c, LAMBDA)
+
+    out = np.empty((n, n), dtype=dtype, order=order)
+    got = woodbury_update_covariance(sigma, c, LAMBDA, out=out)
+    assert got is out
+    tol = 1e-12 if dtype == np.float64 else 1e-5
+    np.testing.assert_allclose(got, sigma_ref, rtol=tol, atol=tol)
+    np.testing.assert_array_equal(got, got.T)
+
+def test_diagonal_sigma_matches_dense_diagonal():
+    sigma, c, mu = _problem(8)
+    d = np.diag(sigma).copy()
+    dmu_ref, sigma_ref = _sherman_morrison(mu, np.diag(d), c, LAMBDA)
+
+    dmu, sigma_ce = ce_posterior_update(mu, d, c, LAMBDA)
+    np.testing.assert_allclose(dmu, dmu_ref, rtol=1e-12)
+    np.testing.assert_allclose(sigma_ce, np.diag(sigma_ref), rtol=1e-12)
+    np.testing.assert_allclose(woodbury_update_covariance(d, c, LAMBDA), np.diag(sigma_ref),
+                               rtol=1e-12)
+    np.testing.assert_allclose(calculate_mean_shift(mu, d, c, LAMBDA), dmu_ref, rtol=1e-12)
+
+@pytest.mark.parametrize("diagonal", [False, True])
+def test_mean_shift_projection(diagonal):
+    """(scale, overlap, k) with Delta_mu = scale * Sigma_TE c."""
+    sigma, c, mu = _problem(8)
+    if diagonal:
+        sigma = np.diag(sigma).copy()
+    v = sigma * c if diagonal else sigma @ c
+
+    scale, overlap, k = mean_shift_projection(mu, sigma, c, LAMBDA)
+    np.testing.assert_allclose(overlap, mu @ c)
+    np.testing.assert_allclose(k, 1.0 + LAMBDA * (c @ v))
+    np.testing.assert_allclose(scale * v, calculate_mean_shift(mu, sigma, c, LAMBDA), rtol=1e-12)
+
+@pytest.mark.parametrize("complex_c", [False, True])
+@pytest.mark.parametrize("diagonal", [False, True])
+def test_woodbury_covariance_methods(complex_c, diagonal):
+    sigma, c, mu = _problem(12, complex_c, seed=2)
+    if diagonal:
+        sigma = np.diag(sigma).copy()
+    dense = ce_posterior_update(mu, np.diag(sigma) if diagonal else sigma, c, LAMBDA)[1]
+    x = np.random.default_rng(9).standard_normal(12)
+
+    cov = WoodburyCovariance(sigma, c, LAMBDA)
+    np.testing.assert_allclose(cov.matvec(x), dense @ x, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(cov.diag(), np.diagonal(dense), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(dense @ cov.solve(x), x, rtol=1e-10, atol=1e-10)
+    expected = np.diagonal(dense) if diagonal else dense
+    np.testing.assert_allclose(cov.todense(), expected, rtol=1e-12, atol=1e-12)
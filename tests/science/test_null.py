@@ -1,7 +1,8 @@
 import numpy as np
 import healpy as hp
 import pytest
-from pbc.stats import calc_phase_alignment
+from pbc.stats import calc_phase_alignment, calc_phase_alignment_batch
+from pbc.utils.sht import synalm_batch
 
 def test_p1_null_convergence():
     """
@@ -16,20 +17,16 @@ def test_p1_null_convergence():
     # The exact shape doesn't matter for the null test, only that it's fixed.
     cl = np.ones(lmax + 1)
     cl[0:2] = 0
-    alm_ctx = hp.synalm(cl, lmax=lmax, new=True)
-    
-    scores = []
+    # Single precision is ample for a 3-sigma null: half the bytes per alm
+    alm_ctx = hp.synalm(cl, lmax=lmax, new=True).astype(np.complex64, copy=False)
     
     # 2. Run Null Suite (Lambda = 0)
-    for _ in range(nsims):
-        # Generate random CMB (uncorrelated with Context)
-        alm_cmb = hp.synalm(cl, lmax=lmax, new=True)
-        
-        # Measure alignment
-        score = calc_phase_alignment(alm_cmb, alm_ctx, lmin=2, lmax=lmax)
-        scores.append(score)
-        
-    scores = np.array(scores)
+    # Generate all random CMBs (uncorrelated with Context) in one draw
+    rng = np.random.default_rng(0)
+    alm_cmb_all = synalm_batch(cl, lmax, nsims, rng).astype(np.complex64, copy=False)
+    
+    # Measure alignment for every simulation at once
+    scores = calc_phase_alignment_batch(alm_cmb_all, alm_ctx, lmin=2, lmax=lmax)
     
     # 3. Assertions
     mean_score = np.mean(scores)
@@ -0,0 +1,43 @@
+import numpy as np
+import healpy as hp
+import pytest
+from pbc.stats import _ell_index, calc_phase_alignment, calc_phase_alignment_batch
+
+L = 12
+
+@pytest.mark.parametrize("lmin, lmax", [
+    (0, L), (0, 0), (2, L), (2, 5), (5, 5), (L, L), (3, L + 4), (7, 3),
+])
+def test_ell_index_matches_mask(lmin, lmax):
+    """The layout arithmetic picks the same alms as the boolean ell mask."""
+    ell = hp.Alm.getlm(L)[0]
+    expected = np.where((ell >= lmin) & (ell <= lmax))[0]
+    np.testing.assert_array_equal(_ell_index(ell.size, lmin, lmax), expected)
+
+@pytest.mark.parametrize("dtype", [np.complex128, np.complex64])
+@pytest.mark.parametrize("lmin, lmax", [(2, 20), (0, L), (4, 4), (9, 5)])
+def test_phase_alignment_batch_matches_scalar(dtype, lmin, lmax):
+    """Each batch row equals calc_phase_alignment, zero modes included."""
+    rng = np.random.default_rng(3)
+    n = hp.Alm.getsize(L)
+    batch = (rng.standard_normal((4, n)) + 1j * rng.standard_normal((4, n))).astype(dtype)
+    ctx = (rng.standard_normal(n) + 1j * rng.standard_normal(n)).astype(dtype)
+    # Zero-amplitude CMB modes (phase 0) and a zero context mode
+    batch[:, hp.Alm.getidx(L, 3, 1)] = 0
+    batch[1, ::5] = 0
+    ctx[hp.Alm.getidx(L, 4, 2)] = 0
+
+    got = calc_phase_alignment_batch(batch, ctx, lmin, lmax)
+    assert got.shape == (batch.shape[0],)
+    expected = [calc_phase_alignment(row, ctx, lmin, lmax) for row in batch]
+    rtol = 1e-5 if dtype == np.complex64 else 1e-12
+    np.testing.assert_allclose(got, expected, rtol=rtol, atol=rtol)
+
+def test_phase_alignment_batch_zero_context():
+    """A context with no power in range gives S_gamma = 0 for every row."""
+    n = hp.Alm.getsize(L)
+    batch = np.ones((3, n), dtype=np.complex128)
+    np.testing.assert_array_equal(
+        calc_phase_alignment_batch(batch, np.zeros(n, dtype=np.complex128)), 0.0)
+    with pytest.raises(ValueError):
+        calc_phase_alignment_batch(batch[:, :-1], np.zeros(n, dtype=np.complex128))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from pbc.utils.grid import hexbin_counts, hist2d_uniform
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("bins", [7, 50])
+def test_hist2d_uniform_matches_histogram2d(dtype, bins):
+    rng = np.random.default_rng(5)
+    x = (149.0 + 2.0 * rng.random(130_000)).astype(dtype)
+    y = (1.5 + 2.0 * rng.random(130_000)).astype(dtype)
+
+    expected, _, _ = np.histogram2d(x, y, bins=bins)
+    np.testing.assert_array_equal(hist2d_uniform(x, y, bins), expected)
+
+    window = [[149.5, 150.5], [2.0, 3.0]]
+    expected, _, _ = np.histogram2d(x, y, bins=bins, range=window)
+    np.testing.assert_array_equal(hist2d_uniform(x, y, bins, range=window), expected)
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_hist2d_uniform_points_on_edges(dtype):
+    """Points exactly on interior linspace edges land where numpy puts them."""
+    rng = np.random.default_rng(6)
+    bins = 20
+    for _ in range(20):
+        lo, hi = np.sort(rng.uniform(-10, 10, 2)).astype(dtype)
+        edges = np.linspace(lo, hi, bins + 1)
+        x = rng.choice(edges, 500).astype(dtype)
+        y = rng.choice(edges, 500).astype(dtype)
+        x[:2], y[:2] = lo, hi  # Fix the bounding box to the edge range
+
+        expected, _, _ = np.histogram2d(x, y, bins=bins)
+        np.testing.assert_array_equal(hist2d_uniform(x, y, bins), expected)
+
+def test_hist2d_uniform_degenerate_extent():
+    x = np.full(10, 3.0)
+    y = np.linspace(0, 1, 10)
+    expected, _, _ = np.histogram2d(x, y, bins=4)
+    np.testing.assert_array_equal(hist2d_uniform(x, y, 4), expected)
+
+def _half_open_loop(x, y, bins, range=None):
+    """The P6 scripts' original per-cell loop: lo <= v < hi on both axes."""
+    if range is None:
+        range = [[x.min(), x.max()], [y.min(), y.max()]]
+    ex = np.linspace(*range[0], bins + 1)
+    ey = np.linspace(*range[1], bins + 1)
+    counts = np.zeros((bins, bins), dtype=np.intp)
+    for i in np.arange(bins):
+        for j in np.arange(bins):
+            counts[i, j] = np.sum((x >= ex[i]) & (x < ex[i + 1]) & (y >= ey[j]) & (y < ey[j + 1]))
+    return counts
+
+@pytest.mark.parametrize("window", [None, [[0.0, 1.0], [0.0, 1.0]], [[0.2, 0.7], [0.1, 0.9]]])
+def test_hist2d_uniform_half_open(window):
+    rng = np.random.default_rng(8)
+    bins = 10
+    x = np.clip(rng.normal(0.5, 0.3, 5000), 0, 1)
+    y = np.clip(rng.normal(0.5, 0.3, 5000), 0, 1)
+    # Points on interior edges and on the top edge of each axis
+    x[:3], y[:3] = [0.5, 1.0, 0.3], [1.0, 0.5, 0.7]
+
+    expected = _half_open_loop(x, y, bins, window)
+    np.testing.assert_array_equal(hist2d_uniform(x, y, bins, range=window, half_open=True),
+                                  expected)
+
+@pytest.mark.parametrize("gridsize", [5, 30, 100])
+def test_hexbin_counts_matches_matplotlib(gridsize):
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rng = np.random.default_rng(11)
+    x = 149.0 + 2.0 * rng.random(50_000)
+    y = 1.5 + 2.0 * rng.standard_normal(50_000) ** 2
+    # Points on the bounding box and on shared lattice coordinates
+    x[:4] = [x.min(), x.max(), x.min(), x.max()]
+    y[:4] = [y.min(), y.max(), y.max(), y.min()]
+
+    fig, ax = plt.subplots()
+    try:
+        expected = ax.hexbin(x, y, gridsize=gridsize, mincnt=0).get_array()
+    finally:
+        plt.close(fig)
+    np.testing.assert_array_equal(hexbin_counts(x, y, gridsize), expected)
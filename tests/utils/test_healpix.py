@@ -0,0 +1,34 @@
+import numpy as np
+import healpy as hp
+import pytest
+
+nmt = pytest.importorskip("pymaster")
+from pbc.utils.healpix import compute_bandpowers, compute_workspace, create_bins, create_field
+
+def _inputs(nside=16, nsims=3):
+    rng = np.random.default_rng(1)
+    npix = hp.nside2npix(nside)
+    mask = (hp.pix2ang(nside, np.arange(npix))[0] > 0.5).astype(float)
+    return rng.standard_normal((nsims, npix)), mask
+
+def _reference(f1, f2, b):
+    w = nmt.NmtWorkspace()
+    w.compute_coupling_matrix(f1, f2, b)
+    return w.decouple_cell(nmt.compute_coupled_cell(f1, f2))
+
+def test_bandpowers_without_workspace():
+    nside = 16
+    maps, mask = _inputs(nside)
+    b = create_bins(nside, nlb=8)
+    f = create_field(maps[0], mask)
+    np.testing.assert_allclose(compute_bandpowers(f, f, b), _reference(f, f, b))
+
+def test_workspace_reused_across_maps():
+    """One workspace serves every map sharing the mask and binning."""
+    nside = 16
+    maps, mask = _inputs(nside)
+    b = create_bins(nside, nlb=8)
+    fields = [create_field(m, mask) for m in maps]
+    w = compute_workspace(fields[0], fields[0], b)
+    for f in fields:
+        np.testing.assert_allclose(compute_bandpowers(f, f, b, workspace=w), _reference(f, f, b))
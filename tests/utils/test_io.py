@@ -0,0 +1,81 @@
+import gzip
+import os
+import numpy as np
+import healpy as hp
+import pytest
+from pbc.utils.io import read_map, uncompressed_catalog
+
+NSIDE = 16
+
+def _maps(n, seed=0):
+    rng = np.random.default_rng(seed)
+    m = rng.standard_normal((n, hp.nside2npix(NSIDE)))
+    # Masked pixels are kept as UNSEEN, not converted to NaN or zero
+    m[:, 100:140] = hp.UNSEEN
+    return m
+
+@pytest.mark.parametrize("nest", [False, True])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_read_map_single_field(tmp_path, nest, dtype):
+    path = tmp_path / "map.fits"
+    hp.write_map(path.as_posix(), _maps(1)[0], nest=nest, dtype=dtype)
+
+    got = read_map(path)
+    expected = hp.read_map(path.as_posix())
+    # Same values and precision as healpy, in native byte order
+    assert got.dtype == expected.dtype.newbyteorder("=") and got.dtype.isnative
+    np.testing.assert_array_equal(got, expected)
+    assert np.count_nonzero(got == hp.UNSEEN) == 40
+
+@pytest.mark.parametrize("nest", [False, True])
+def test_read_map_tuple_field(tmp_path, nest):
+    path = tmp_path / "maps.fits"
+    hp.write_map(path.as_posix(), _maps(3), nest=nest)
+
+    got = read_map(path, field=(1, 2))
+    expected = hp.read_map(path.as_posix(), field=(1, 2))
+    assert got.shape == (2, hp.nside2npix(NSIDE))
+    np.testing.assert_array_equal(got, expected)
+    # An int field stays one map, even when it is not the first column
+    np.testing.assert_array_equal(read_map(path, field=2), expected[1])
+
+@pytest.mark.parametrize("nest", [False, True])
+@pytest.mark.parametrize("field", [0, (0, 1)])
+def test_read_map_quick_nside(tmp_path, nest, field):
+    path = tmp_path / "maps.fits"
+    hp.write_map(path.as_posix(), _maps(2), nest=nest)
+
+    got = read_map(path, quick_nside=NSIDE // 4, field=field)
+    expected = hp.ud_grade(hp.read_map(path.as_posix(), field=field), NSIDE // 4, power=-2)
+    # Quick-look maps are averaged in float32
+    assert got.dtype == np.float32
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-5 * np.abs(expected).max())
+    # Same nside: no downgrade, full precision
+    np.testing.assert_array_equal(read_map(path, quick_nside=NSIDE, field=field),
+                                  hp.read_map(path.as_posix(), field=field))
+
+def test_read_map_partial_sky(tmp_path):
+    path = tmp_path / "partial.fits"
+    m = _maps(1)[0]
+    hp.write_map(path.as_posix(), m, partial=True)
+    np.testing.assert_array_equal(read_map(path), hp.read_map(path.as_posix()))
+
+def test_read_map_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_map(tmp_path / "absent.fits")
+
+def test_uncompressed_catalog(tmp_path):
+    gz = tmp_path / "cat.fits.gz"
+    with gzip.open(gz, "wb") as f:
+        f.write(b"catalog v1")
+
+    out = uncompressed_catalog(gz)
+    assert out == tmp_path / "cat.fits"
+    assert out.read_bytes() == b"catalog v1"
+    assert not (tmp_path / "cat.fits.part").exists()
+    assert uncompressed_catalog(out) == out
+
+    # An existing .fits is never overwritten, even if older than the .gz
+    out.write_bytes(b"user copy")
+    os.utime(out, (0, 0))
+    assert uncompressed_catalog(gz).read_bytes() == b"user copy"